@@ -1,27 +1,23 @@
 """Google OAuth authentication script for generating and refreshing tokens.
 
 Usage:
-    python scripts/authenticate.py                    # Authenticate with both Drive and Gmail scopes
-    python scripts/authenticate.py --drive-only       # Authenticate with Drive scopes only
-    python scripts/authenticate.py --gmail-only       # Authenticate with Gmail scopes only
+    python scripts/authenticate.py                  # Authenticate with both Drive and Gmail scopes
+    python scripts/authenticate.py --drive-only     # Authenticate with Drive scopes only
+    python scripts/authenticate.py --gmail-only     # Authenticate with Gmail scopes only
 """
 
 from __future__ import annotations
 
-import json
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
-try:
-    from google.auth.transport.requests import Request
+if TYPE_CHECKING:
     from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-except ImportError:
-    print("❌ Missing required packages. Install with:")
-    print("   pip install google-auth-oauthlib")
-    sys.exit(1)
 
 # Google API scopes
 DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive"]
@@ -45,31 +41,37 @@ def authenticate(
     Returns:
         OAuth Credentials object
     """
+    # Imports diferidos: --help y errores de argumentos no cargan las librerías de Google
+    try:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+    except ImportError:
+        print("❌ Missing required packages. Install with:")
+        print("   pip install google-auth-oauthlib")
+        sys.exit(1)
+
     creds_path = Path(token_path)
     creds = None
 
     # Load existing token if available
     if creds_path.exists() and not force_refresh:
-        with open(creds_path) as f:
-            token_data = json.load(f)
-        creds = Credentials.from_authorized_user_info(token_data, scopes)
-
-        # Refresh if expired
-        if creds and creds.expired and creds.refresh_token:
-            print(f"🔄 Token expired, refreshing...")
-            creds.refresh(Request())
-            _save_token(creds, creds_path)
-            print(f"✅ Token refreshed successfully!")
+        from src.infrastructure.google_credentials import load_oauth_credentials
+
+        creds = load_oauth_credentials(credentials_path, token_path, scopes)
+
+        # Sin refresh aquí: el transporte autorizado refresca ante token vencido o 401
+        # y persiste el token renovado en token.json
+        if creds.refresh_token:
+            print("✅ Stored token found, it will be refreshed on demand by the API clients")
             return creds
 
     # If no valid credentials, run OAuth flow
-    if not creds or not creds.valid:
+    if creds is None or not creds.valid:
         if creds_path.exists() and force_refresh:
-            print(f"🔄 Force refresh requested, starting OAuth flow...")
+            print("🔄 Force refresh requested, starting OAuth flow...")
 
-        print(f"🔐 Starting OAuth flow...")
+        print("🔐 Starting OAuth flow...")
         print(f"📧 Scopes: {', '.join(scopes)}")
-        print(f"🌐 A browser window will open for authentication...")
+        print("🌐 A browser window will open for authentication...")
 
         flow = InstalledAppFlow.from_client_secrets_file(credentials_path, scopes)
         creds = flow.run_local_server(
@@ -85,17 +87,11 @@ def authenticate(
 
 
 def _save_token(creds: Credentials, token_path: Path) -> None:
-    """Save credentials to token file."""
-    token_data = {
-        "token": creds.token,
-        "refresh_token": creds.refresh_token,
-        "token_uri": creds.token_uri,
-        "client_id": creds.client_id,
-        "client_secret": creds.client_secret,
-        "scopes": creds.scopes,
-    }
+    """Save credentials (including expiry) to token file."""
+    from src.infrastructure.google_credentials import save_oauth_token
+
     token_path.parent.mkdir(parents=True, exist_ok=True)
-    token_path.write_text(json.dumps(token_data, indent=2))
+    save_oauth_token(creds, token_path)
 
 
 def main() -> None:
@@ -112,12 +108,13 @@ def main() -> None:
         default="credentials/token.json",
         help="Path to save/load token (default: credentials/token.json)",
     )
-    parser.add_argument(
+    scope_group = parser.add_mutually_exclusive_group()
+    scope_group.add_argument(
         "--drive-only",
         action="store_true",
         help="Authenticate with Drive scopes only",
     )
-    parser.add_argument(
+    scope_group.add_argument(
         "--gmail-only",
         action="store_true",
         help="Authenticate with Gmail scopes only",
@@ -130,11 +127,6 @@ def main() -> None:
 
     args = parser.parse_args()
 
-    # Validate arguments
-    if args.drive_only and args.gmail_only:
-        print("❌ Cannot specify both --drive-only and --gmail-only")
-        sys.exit(1)
-
     # Determine scopes
     if args.drive_only:
         scopes = DRIVE_SCOPES
@@ -150,12 +142,12 @@ def main() -> None:
     creds_file = Path(args.credentials)
     if not creds_file.exists():
         print(f"❌ Credentials file not found: {args.credentials}")
-        print(f"\n📋 To create credentials:")
-        print(f"   1. Go to: https://console.cloud.google.com/")
-        print(f"   2. Create a project or select existing one")
-        print(f"   3. Enable Google Drive API and Gmail API")
-        print(f"   4. Go to Credentials → Create OAuth 2.0 Client ID")
-        print(f"   5. Application type: Desktop app")
+        print("\n📋 To create credentials:")
+        print("   1. Go to: https://console.cloud.google.com/")
+        print("   2. Create a project or select existing one")
+        print("   3. Enable Google Drive API and Gmail API")
+        print("   4. Go to Credentials → Create OAuth 2.0 Client ID")
+        print("   5. Application type: Desktop app")
         print(f"   6. Download JSON and save as: {args.credentials}")
         sys.exit(1)
 
@@ -168,11 +160,11 @@ def main() -> None:
             force_refresh=args.force_refresh,
         )
 
-        print(f"\n✅ Authentication complete!")
+        print("\n✅ Authentication complete!")
         print(f"📝 Token saved to: {args.token}")
-        print(f"\n💡 Next steps:")
-        print(f"   - Run: python scripts/test_oauth.py")
-        print(f"   - Your app can now use these credentials")
+        print("\n💡 Next steps:")
+        print("   - Run: python scripts/test_oauth.py")
+        print("   - Your app can now use these credentials")
 
     except Exception as e:
         print(f"\n❌ Authentication failed: {e}")
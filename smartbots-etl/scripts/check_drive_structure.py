@@ -0,0 +1,106 @@
+"""Debug: inspecciona la estructura de una carpeta en Google Drive.
+
+Usage:
+    python scripts/check_drive_structure.py                        # Carpeta 'Operaciones'
+    python scripts/check_drive_structure.py --folder "ETL Facturas"
+    python scripts/check_drive_structure.py --config configs/configuration.yaml
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any
+
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from src.application.config import load_config
+
+LIST_FIELDS = "nextPageToken, files(id, name, mimeType, parents)"
+
+
+def list_all(service: Any, shared_drive: bool = False, **params: Any) -> list[dict]:
+    """Ejecuta files().list recorriendo todas las páginas de resultados."""
+    params = {"fields": LIST_FIELDS, "pageSize": 1000, **params}
+    if shared_drive:
+        params["supportsAllDrives"] = True
+        params["includeItemsFromAllDrives"] = True
+
+    files: list[dict] = []
+    page_token: str | None = None
+    while True:
+        if page_token:
+            params["pageToken"] = page_token
+        response = service.files().list(**params).execute()
+        files.extend(response.get("files", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspecciona la estructura de Drive")
+    parser.add_argument(
+        "--config",
+        default="configs/configuration.yaml",
+        help="Ruta al YAML de configuración (default: configs/configuration.yaml)",
+    )
+    parser.add_argument(
+        "--folder",
+        default="Operaciones",
+        help="Nombre de la carpeta a inspeccionar (default: Operaciones)",
+    )
+    parser.add_argument(
+        "--shared-drive",
+        action="store_true",
+        help="Incluir elementos de Shared Drives",
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+
+    # Imports diferidos: --help no carga googleapiclient
+    from src.infrastructure.drive_path_resolver import FOLDER_MIME, escape_query_value
+    from src.infrastructure.google_credentials import build_google_credentials
+    from src.infrastructure.google_services import build_google_service
+    from src.infrastructure.oauth_google_drive_adapter import SCOPES as DRIVE_SCOPES
+
+    credentials = build_google_credentials(
+        config.google.credentials_path, config.google.token_path, DRIVE_SCOPES
+    )
+    service = build_google_service("drive", "v3", credentials)
+
+    name = escape_query_value(args.folder)
+    parents = list_all(
+        service,
+        args.shared_drive,
+        q=f"name = '{name}' and mimeType = '{FOLDER_MIME}' and trashed = false",
+    )
+    if not parents:
+        print(f"❌ Carpeta no encontrada: {args.folder}")
+        return 1
+
+    parent = parents[0]
+    print(f"📁 {parent['name']} (ID: {parent['id']}, parents: {parent.get('parents', [])})")
+    if len(parents) > 1:
+        print(f"⚠️  {len(parents)} carpetas con el mismo nombre, se usa la primera")
+
+    children = list_all(
+        service,
+        args.shared_drive,
+        q=f"'{parent['id']}' in parents and trashed = false",
+        orderBy="folder,name",
+    )
+    for item in children:
+        icon = "📁" if item.get("mimeType") == FOLDER_MIME else "📄"
+        print(f"   {icon} {item['name']} (ID: {item['id']}, {item.get('mimeType', 'Unknown')})")
+
+    print(f"\n✅ {len(children)} elementos encontrados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,32 +20,20 @@ Flujo de ejecución:
 import sys
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-import structlog
-
-from src.application.config import load_config
-from src.infrastructure.logging_config import setup_logging
-from src.infrastructure.oauth_google_drive_adapter import OAuthGoogleDriveAdapter
-from src.infrastructure.excel_handler import OpenpyxlExcelHandler
-from src.infrastructure.oauth_gmail_notifier import OAuthGmailNotifier
-from src.infrastructure.sqlite_tracker import SqliteTracker
-from src.infrastructure.drive_path_resolver import DrivePathResolver
-from src.infrastructure.file_lifecycle_manager import FileLifecycleManager
-from src.application.use_cases.consolidate_invoices import ConsolidateInvoicesUseCase
-
-def clear_screen():
-    import os
-    import subprocess
-    if os.name == 'nt':
-        subprocess.run([r"C:\\Windows\\System32\\cmd.exe", "/c", "cls"])
-    else:
-        from shutil import which
-        clear_cmd = which("clear")
-        if clear_cmd:
-            subprocess.run([clear_cmd])
-        else:
-            print("\033c", end="")  # fallback: ANSI clear screen
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from src.application.config import DEFAULT_TOKEN_PATH, TEMPLATES_DIR, load_config
+
+
+def clear_screen() -> None:
+    """Limpia la terminal con secuencias ANSI; no hace nada si stdout no es una TTY."""
+    if not sys.stdout.isatty():
+        return
+    sys.stdout.write("\x1b[2J\x1b[H")
+    sys.stdout.flush()
+
 
 def main() -> int:
     # 0. Limpiar pantalla al inicio
@@ -55,6 +43,21 @@ def main() -> int:
     config_path = sys.argv[1] if len(sys.argv) > 1 else "configs/configuration.yaml"
     config = load_config(config_path)
 
+    # Imports diferidos: adaptadores y clientes de Google solo con una configuración válida
+    import structlog
+
+    from src.application.use_cases.consolidate_invoices import ConsolidateInvoicesUseCase
+    from src.infrastructure.drive_path_resolver import DrivePathResolver
+    from src.infrastructure.excel_handler import OpenpyxlExcelHandler
+    from src.infrastructure.file_lifecycle_manager import FileLifecycleManager
+    from src.infrastructure.google_credentials import build_google_credentials
+    from src.infrastructure.google_services import build_authorized_http
+    from src.infrastructure.logging_config import setup_logging
+    from src.infrastructure.oauth_gmail_notifier import GMAIL_SCOPES, OAuthGmailNotifier
+    from src.infrastructure.oauth_google_drive_adapter import SCOPES as DRIVE_SCOPES
+    from src.infrastructure.oauth_google_drive_adapter import OAuthGoogleDriveAdapter
+    from src.infrastructure.sqlite_tracker import SqliteTracker
+
     # 2. Configurar logging
     setup_logging(
         log_level=config.logging.level,
@@ -63,15 +66,26 @@ def main() -> int:
     logger = structlog.get_logger()
     logger.info("consolidation_starting", config_path=config_path)
 
-    # 3. Inicializar adaptador de Google Drive (OAuth)
+    # 3. Cargar credenciales OAuth una sola vez (compartidas por Drive y Gmail)
+    credentials = build_google_credentials(
+        config.google.credentials_path,
+        str(DEFAULT_TOKEN_PATH),
+        DRIVE_SCOPES + GMAIL_SCOPES,
+    )
+    #    Un único transporte HTTP: Drive y Gmail comparten conexiones keep-alive
+    http = build_authorized_http(credentials)
+
+    #    Inicializar adaptador de Google Drive (OAuth)
     drive = OAuthGoogleDriveAdapter(
         credentials_path=config.google.credentials_path,
-        token_path="credentials/token.json",
+        token_path=str(DEFAULT_TOKEN_PATH),
         shared_drive_id=None,
+        credentials=credentials,
+        http=http,
     )
 
     # 4. Inicializar resolvedor de rutas de Drive
-    path_resolver = DrivePathResolver(drive.service, None)
+    path_resolver = DrivePathResolver(drive.service, None, cache_path=config.drive.path_cache)
     # 5. Inicializar gestor de ciclo de vida de archivos
     lifecycle = FileLifecycleManager(
         drive_service=drive.service,
@@ -84,9 +98,11 @@ def main() -> int:
     # 7. Inicializar notificador de Gmail
     notifier = OAuthGmailNotifier(
         credentials_path=config.google.credentials_path,
-        token_path="credentials/token.json",
+        token_path=str(DEFAULT_TOKEN_PATH),
         sender=config.email.sender,
-        templates_dir=Path("src/templates"),
+        templates_dir=TEMPLATES_DIR,
+        credentials=credentials,
+        http=http,
     )
     # 8. Inicializar tracker de SQLite
     tracker = SqliteTracker(db_path=config.tracking.db_path)
@@ -108,7 +124,8 @@ def main() -> int:
         #     → Flujo en consolidate_invoices.py:
         #       - Lista archivos en carpeta source de Drive
         #       - Descarga cada archivo Excel
-        #       - Extrae datos usando OfficialFormatExtractor (src/infrastructure/official_format_extractor.py)
+        #       - Extrae datos usando OfficialFormatExtractor
+        #         (src/infrastructure/official_format_extractor.py)
         #       - Lee archivo consolidado
         #       - Hace upsert de registros
         #       - Actualiza archivo consolidado en Drive
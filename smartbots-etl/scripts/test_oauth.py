@@ -0,0 +1,87 @@
+"""Valida las credenciales OAuth contra Google Drive y Gmail.
+
+Usage:
+    python scripts/test_oauth.py [path/to/config.yaml]
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from src.application.config import load_config
+
+if TYPE_CHECKING:
+    from googleapiclient.errors import HttpError
+
+
+def probe_drive(service: Any) -> dict[str, Any]:
+    """Ejecuta las consultas de prueba de Drive en un único batch HTTP (1 round-trip)."""
+    results: dict[str, Any] = {}
+
+    def on_response(request_id: str, response: Any, exception: HttpError | None) -> None:
+        results[request_id] = exception if exception is not None else response
+
+    batch = service.new_batch_http_request(callback=on_response)
+    batch.add(service.about().get(fields="user(displayName, emailAddress)"), request_id="about")
+    batch.add(
+        service.files().list(pageSize=5, fields="files(id, name, mimeType)"),
+        request_id="files",
+    )
+    batch.execute()
+    return results
+
+
+def main() -> int:
+    config_path = sys.argv[1] if len(sys.argv) > 1 else "configs/configuration.yaml"
+    config = load_config(config_path)
+
+    print("🔐 Testing OAuth authentication...")
+
+    # Imports diferidos hasta después de validar la configuración
+    from googleapiclient.errors import HttpError
+
+    from src.infrastructure.google_credentials import build_google_credentials
+    from src.infrastructure.google_services import build_google_service
+    from src.infrastructure.oauth_gmail_notifier import GMAIL_SCOPES
+    from src.infrastructure.oauth_google_drive_adapter import SCOPES as DRIVE_SCOPES
+
+    credentials = build_google_credentials(
+        config.google.credentials_path,
+        config.google.token_path,
+        DRIVE_SCOPES + GMAIL_SCOPES,
+    )
+
+    ok = True
+
+    # Drive: perfil + listado en una sola petición batch
+    drive = build_google_service("drive", "v3", credentials)
+    results = probe_drive(drive)
+    for request_id, result in results.items():
+        if isinstance(result, HttpError):
+            ok = False
+            print(f"❌ Drive ({request_id}): {result}")
+    if ok:
+        user = results["about"].get("user", {})
+        print(f"✅ Drive OK: {user.get('displayName')} <{user.get('emailAddress')}>")
+        for f in results["files"].get("files", []):
+            print(f"   📄 {f['name']} ({f['mimeType']})")
+
+    # Gmail: el scope gmail.send no permite lecturas (getProfile), solo se valida el scope
+    granted = set(credentials.scopes or [])
+    if set(GMAIL_SCOPES) <= granted:
+        print("✅ Gmail OK: scope gmail.send concedido")
+    else:
+        ok = False
+        print(f"❌ Gmail: falta scope {GMAIL_SCOPES[0]} (ejecute scripts/authenticate.py)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,30 +2,56 @@
 
 from __future__ import annotations
 
+import functools
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Annotated, Any
 
 import yaml
+from pydantic import BeforeValidator, ConfigDict, TypeAdapter
 
+try:
+    # Parser libyaml (C) cuando está disponible; mismo comportamiento que safe_load
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - depende de cómo se compiló PyYAML
+    from yaml import SafeLoader as _YamlLoader  # type: ignore[assignment]
 
-@dataclass(frozen=True)
+# Rutas del proyecto resueltas una sola vez al importar el módulo
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEMPLATES_DIR = REPO_ROOT / "src" / "templates"
+DEFAULT_TOKEN_PATH = REPO_ROOT / "credentials" / "token.json"
+
+# Claves desconocidas en el YAML (p. ej. un typo) son un error, no se ignoran
+_STRICT_KEYS = ConfigDict(extra="forbid")
+
+
+@dataclass(frozen=True, slots=True)
 class GoogleConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     credentials_path: str
     token_path: str = "./credentials/token.json"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DrivePathsConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     source_path: str
     in_process_folder: str = "En Proceso"
     backup_path: str = "Respaldo"
     consolidated_path: str = "Consolidado"
     consolidated_filename: str = "consolidado.xlsx"
+    # Caché de folder IDs entre ejecuciones (opt-in): archivo JSON, p. ej. data/drive_paths.json
+    path_cache: str | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ExcelConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     source_sheet: str = "Sheet1"
     consolidated_sheet: str = "Consolidado"
     header_row: int = 6
@@ -60,118 +86,110 @@ class ExcelConfig:
         }
     )
     date_format: str = "%d-%m-%Y"
+    # Encabezado exacto (original o ya estandarizado) -> nombre estándar, de solo lectura;
+    # se calcula una vez al construir la config
+    column_lookup: Mapping[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        lookup = {std: std for std in self.column_mapping.values()}
+        lookup.update(self.column_mapping)
+        object.__setattr__(self, "column_lookup", MappingProxyType(lookup))
+
+
+def _split_emails(value: Any) -> Any:
+    """Acepta listas o strings separados por comas ("a@x.com, b@x.com")."""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return tuple(email.strip() for email in value.split(",") if email.strip())
+    return value
 
 
-@dataclass(frozen=True)
+EmailList = Annotated[tuple[str, ...], BeforeValidator(_split_emails)]
+
+
+@dataclass(frozen=True, slots=True)
 class EmailConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     sender: str
-    to: tuple[str, ...] = ()
-    cc: tuple[str, ...] = ()
-    bcc: tuple[str, ...] = ()
+    to: EmailList = ()
+    cc: EmailList = ()
+    bcc: EmailList = ()
     subject_prefix: str = "[Smartbots ETL]"
     templates: dict[str, str] = field(default_factory=dict)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TrackingConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     db_path: str = "data/etl_tracking.db"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoggingConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     level: str = "INFO"
     log_to_file: bool = True
     log_dir: str = "logs"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DownloadsConfig:
     """Configuración para descargas locales temporales."""
 
+    __pydantic_config__ = _STRICT_KEYS
+
     temp_path: str = "data/downloads"
+    max_workers: int = 4  # descargas concurrentes de archivos fuente
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppConfig:
+    __pydantic_config__ = _STRICT_KEYS
+
     google: GoogleConfig
     drive: DrivePathsConfig
-    excel: ExcelConfig
     email: EmailConfig
-    tracking: TrackingConfig
-    logging: LoggingConfig
-    downloads: DownloadsConfig
+    excel: ExcelConfig = field(default_factory=ExcelConfig)
+    tracking: TrackingConfig = field(default_factory=TrackingConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    downloads: DownloadsConfig = field(default_factory=DownloadsConfig)
+
+
+# Validador compilado (pydantic-core): valida y construye las dataclasses en una pasada,
+# coerciona listas a tuplas y reporta campos faltantes como ValidationError (ValueError).
+_APP_CONFIG_ADAPTER: TypeAdapter[AppConfig] = TypeAdapter(AppConfig)
 
 
 def load_config(config_path: str | Path) -> AppConfig:
-    """Carga y valida la configuración desde un archivo YAML."""
+    """Carga y valida la configuración desde un archivo YAML.
+
+    El resultado se memoiza por (ruta, mtime): llamadas repetidas sobre un archivo
+    sin cambios retornan la misma instancia inmutable de AppConfig.
+    """
     # Resuelve la ruta de forma absoluta para evitar problemas con el directorio de trabajo actual
     path = Path(config_path).resolve()
     if not path.exists():
         msg = f"Archivo de configuración no encontrado: {path}"
         raise FileNotFoundError(msg)
 
-    with open(path, encoding="utf-8") as f:
-        raw = yaml.safe_load(f)
-
-    if not isinstance(raw, dict):
-        msg = f"YAML inválido: se esperaba dict, se obtuvo {type(raw).__name__}"
-        raise ValueError(msg)
+    return _load_config_cached(str(path), path.stat().st_mtime_ns)
 
-    _validate_required_keys(raw)
 
-    return AppConfig(
-        google=_build_google_config(raw.get("google", {})),
-        drive=_build_drive_config(raw.get("drive", {})),
-        excel=_build_excel_config(raw.get("excel", {})),
-        email=_build_email_config(raw.get("email", {})),
-        tracking=TrackingConfig(**raw.get("tracking", {})),
-        logging=LoggingConfig(**raw.get("logging", {})),
-        downloads=DownloadsConfig(**raw.get("downloads", {})),
-    )
-
-
-def _validate_required_keys(raw: dict[str, Any]) -> None:
-    """Valida que las secciones requeridas existan en el YAML."""
-    required = {"google", "drive", "email"}
-    missing = required - set(raw.keys())
-    if missing:
-        msg = f"Secciones requeridas faltantes en YAML: {sorted(missing)}"
-        raise ValueError(msg)
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path_str: str, mtime_ns: int) -> AppConfig:
+    """Parsea el YAML y construye AppConfig. mtime_ns solo participa como clave de caché."""
+    # Bytes directos: libyaml detecta la codificación (BOM/UTF-8) y parsea el buffer en C
+    raw = yaml.load(Path(path_str).read_bytes(), Loader=_YamlLoader)  # noqa: S506 - loader seguro
 
-
-def _build_google_config(data: dict[str, Any]) -> GoogleConfig:
-    if "credentials_path" not in data:
-        msg = "google.credentials_path es requerido"
-        raise ValueError(msg)
-    return GoogleConfig(**data)
-
-
-def _build_drive_config(data: dict[str, Any]) -> DrivePathsConfig:
-    if "source_path" not in data:
-        msg = "drive.source_path es requerido"
+    if not isinstance(raw, dict):
+        msg = f"YAML inválido: se esperaba dict, se obtuvo {type(raw).__name__}"
         raise ValueError(msg)
-    return DrivePathsConfig(**data)
 
+    return _APP_CONFIG_ADAPTER.validate_python(raw)
 
-def _build_excel_config(data: dict[str, Any]) -> ExcelConfig:
-    """Construye ExcelConfig, convirtiendo listas a tuplas para frozen dataclass."""
-    data = dict(data)  # shallow copy
-    if "expected_columns" in data:
-        data["expected_columns"] = tuple(data["expected_columns"])
-    return ExcelConfig(**data)
 
-
-def _build_email_config(data: dict[str, Any]) -> EmailConfig:
-    """Construye EmailConfig, parseando strings separados por comas a tuplas."""
-    data = dict(data)
-    if "sender" not in data:
-        msg = "email.sender es requerido"
-        raise ValueError(msg)
-    for key in ("to", "cc", "bcc"):
-        if key in data:
-            value = data[key]
-            if isinstance(value, str):
-                data[key] = tuple(email.strip() for email in value.split(",") if email.strip())
-            elif isinstance(value, list):
-                data[key] = tuple(value)
-    return EmailConfig(**data)
+load_config.cache_clear = _load_config_cached.cache_clear  # type: ignore[attr-defined]
@@ -5,13 +5,26 @@ from typing import Optional
 
 from src.domain.entities import InvoiceRecord
 
+# Filas de error incluidas en el email; el resto se resume en una fila final
+MAX_ERROR_ROWS = 20
+_ERROR_ROW = "<tr><td>{file}</td><td>{row_index}</td><td>{error}</td></tr>"
+
+
+class _ErrorFields(dict):
+    """Campos de un error de validación; los ausentes se muestran como N/A."""
+
+    def __missing__(self, key: str) -> str:
+        return "N/A"
+
 
 @dataclass
 class UpsertResult:
     inserted: int = 0
     updated: int = 0
     unchanged: int = 0
-    all_records: list[InvoiceRecord] = field(default_factory=list)
+    new_records: list[InvoiceRecord] = field(default_factory=list)
+    # Los mismos registros nuevos indexados por clave primaria
+    new_by_pk: dict[tuple, InvoiceRecord] = field(default_factory=dict)
 
     @property
     def total_processed(self) -> int:
@@ -74,15 +87,9 @@ class ExecutionReport:
     def _build_error_rows_html(self) -> str:
         if not self.validation_errors:
             return ""
-        rows = []
-        for err in self.validation_errors[:20]:
-            rows.append(
-                f"<tr><td>{err.get('file', 'N/A')}</td>"
-                f"<td>{err.get('row_index', 'N/A')}</td>"
-                f"<td>{err.get('error', 'N/A')}</td></tr>"
-            )
-        if len(self.validation_errors) > 20:
-            rows.append(
-                f"<tr><td colspan='3'>... y {len(self.validation_errors) - 20} más</td></tr>"
-            )
+        row_html = _ERROR_ROW.format_map
+        rows = [row_html(_ErrorFields(err)) for err in self.validation_errors[:MAX_ERROR_ROWS]]
+        remaining = len(self.validation_errors) - MAX_ERROR_ROWS
+        if remaining > 0:
+            rows.append(f"<tr><td colspan='3'>... y {remaining} más</td></tr>")
         return "\n".join(rows)
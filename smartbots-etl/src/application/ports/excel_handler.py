@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from pathlib import Path
 from typing import Protocol
 
@@ -6,8 +7,14 @@ import pandas as pd
 
 class ExcelReader(Protocol):
     def read(
-        self, file_path: Path, sheet_name: str = "Sheet1", header_row: int | None = None
-    ) -> pd.DataFrame: ...
+        self,
+        file_path: Path,
+        sheet_name: str = "Sheet1",
+        header_row: int | None = None,
+        usecols: Callable[[str], bool] | None = None,
+    ) -> pd.DataFrame:
+        """usecols: filtro de encabezados; solo esas columnas se materializan."""
+        ...
 
     def validate_schema(
         self, df: pd.DataFrame, expected_columns: list[str]
@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from typing import Any, Protocol
 from pathlib import Path
 
@@ -8,8 +9,8 @@ class Notifier(Protocol):
         subject: str,
         template_name: str,
         template_vars: dict[str, Any],
-        recipients: list[str],
-        cc: list[str] | None = None,
-        bcc: list[str] | None = None,
+        recipients: Sequence[str],
+        cc: Sequence[str] | None = None,
+        bcc: Sequence[str] | None = None,
         attachments: list[Path] | None = None,
     ) -> None: ...
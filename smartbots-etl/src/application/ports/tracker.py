@@ -67,6 +67,10 @@ class Tracker(Protocol):
         """Verifica si un archivo ya fue procesado exitosamente (idempotencia)."""
         ...
 
+    def filter_unprocessed(self, files: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Retorna los archivos aún no procesados (idempotencia en lote, una consulta)."""
+        ...
+
     def get_run_summary(self, run_uuid: str) -> dict[str, Any]:
         """Retorna resumen de una ejecución."""
         ...
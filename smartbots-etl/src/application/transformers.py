@@ -1,14 +1,59 @@
+from collections.abc import Callable, Hashable
 from datetime import UTC, date, datetime
 from decimal import Decimal, InvalidOperation
+from typing import Any
+
+import pandas as pd
 
 from src.domain.entities import InvoiceRecord
 from src.application.config import ExcelConfig
 
+# Caracteres ignorados al parsear montos: símbolo de moneda y espacios
+_MONEY_STRIP = str.maketrans("", "", "$ ")
+
+_REQUIRED_FIELDS = ("invoice_number", "reference_number", "carrier_name", "invoice_date")
+_STRING_FIELDS = (
+    "invoice_number",
+    "reference_number",
+    "carrier_name",
+    "ship_name",
+    "dispatch_guides",
+    "description",
+    "fecha_recepcion_digital",
+    "aprobado_por",
+    "estado_operaciones",
+    "fecha_aprobacion_operaciones",
+)
+
+# Campos de baja cardinalidad: sus valores se comparten entre registros vía _intern
+_POOLED_FIELDS = frozenset(
+    ("carrier_name", "ship_name", "aprobado_por", "estado_operaciones", "currency")
+)
+
+
+class _Failed:
+    """Marca un valor de celda que no pudo convertirse."""
+
+
+_FAILED = _Failed()
+# Errores esperables al convertir un valor de celda (fecha, monto, texto)
+_CONVERSION_ERRORS = (ValueError, TypeError, InvalidOperation, OverflowError)
+
 
 class RowTransformer:
     def __init__(self, config: ExcelConfig) -> None:
         self.config = config
         self.column_map = config.column_mapping
+        # Encabezados de la fuente -> {nombre estándar: encabezado}; se resuelve una vez
+        # por conjunto de encabezados, no por fila
+        self._plan_cache: dict[tuple[Hashable, ...], dict[str, Hashable]] = {}
+        # Formatos de fecha en orden de prueba; el último exitoso se intenta primero
+        self._date_formats = tuple(
+            dict.fromkeys((config.date_format, "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"))
+        )
+        self._last_date_format = config.date_format
+        # Un solo objeto str por valor repetido (transportista, nave, moneda, ...)
+        self._string_pool: dict[str, str] = {}
 
     def transform_row(self, row: dict, source_name: str) -> InvoiceRecord:
         mapped = self._apply_column_mapping(row)
@@ -20,33 +65,140 @@ class RowTransformer:
         return InvoiceRecord(
             invoice_number=self._clean_string(mapped["invoice_number"]),
             reference_number=self._clean_string(mapped["reference_number"]),
-            carrier_name=self._clean_string(mapped["carrier_name"]),
-            ship_name=self._clean_string(mapped.get("ship_name", "")),
+            carrier_name=self._intern(self._clean_string(mapped["carrier_name"])),
+            ship_name=self._intern(self._clean_string(mapped.get("ship_name", ""))),
             dispatch_guides=self._clean_string(mapped.get("dispatch_guides", "")),
             invoice_date=self._parse_date(mapped["invoice_date"]),
             description=self._clean_string(mapped.get("description", "")),
             net_amount=net,
             tax_amount=tax,
             total_amount=total,
-            currency=self._clean_string(mapped.get("currency", "CLP")).upper(),
+            currency=self._intern(self._clean_string(mapped.get("currency", "CLP")).upper()),
             fecha_recepcion_digital=self._clean_string(mapped.get("fecha_recepcion_digital", "")),
-            aprobado_por=self._clean_string(mapped.get("aprobado_por", "")),
-            estado_operaciones=self._clean_string(mapped.get("estado_operaciones", "")),
+            aprobado_por=self._intern(self._clean_string(mapped.get("aprobado_por", ""))),
+            estado_operaciones=self._intern(
+                self._clean_string(mapped.get("estado_operaciones", ""))
+            ),
             fecha_aprobacion_operaciones=self._clean_string(
                 mapped.get("fecha_aprobacion_operaciones", "")
             ),
-            source_file=source_name,
+            source_file=self._intern(source_name),
             processed_at=datetime.now(UTC),
         )
 
+    def transform_dataframe(
+        self, df: pd.DataFrame, source_name: str
+    ) -> tuple[list[InvoiceRecord], list[tuple[Hashable, Exception]]]:
+        """Transforma un DataFrame completo columna a columna.
+
+        Cada columna se convierte una vez por valor distinto (los valores repetidos
+        como transportista, moneda o fecha no se re-parsean) y los registros se
+        construyen en una sola pasada. Las filas que fallan se reprocesan con
+        transform_row para reportar el mismo error que el camino fila a fila.
+
+        Returns:
+            (registros válidos, [(índice de fila, excepción)])
+        """
+        columns = self._map_columns(df.columns)
+        if any(name not in columns for name in _REQUIRED_FIELDS):
+            return self._transform_rows(df, source_name)
+
+        n = len(df)
+
+        def column(name: str, convert: Callable[[Any], Any], default: Any) -> list[Any]:
+            if name not in columns:
+                return [default] * n
+            return _convert_unique(df[columns[name]].tolist(), convert)
+
+        def pooled_string(value: Any) -> str:
+            return self._intern(self._clean_string(value))
+
+        strings = {
+            name: column(name, pooled_string if name in _POOLED_FIELDS else self._clean_string, "")
+            for name in _STRING_FIELDS
+        }
+        dates = column("invoice_date", self._parse_date, None)
+        totals = column("total_amount", self._parse_money, Decimal("0"))
+        nets = column("net_amount", self._parse_money, None) if "net_amount" in columns else totals
+        taxes = column("tax_amount", self._parse_money, Decimal("0"))
+        currencies = column(
+            "currency", lambda v: self._intern(self._clean_string(v).upper()), "CLP"
+        )
+        processed_at = datetime.now(UTC)
+        source_name = self._intern(source_name)
+
+        records: list[InvoiceRecord] = []
+        errors: list[tuple[Hashable, Exception]] = []
+        for i, idx in enumerate(df.index):
+            values = (dates[i], totals[i], nets[i], taxes[i], currencies[i])
+            try:
+                if any(v is _FAILED for v in values) or any(
+                    strings[name][i] is _FAILED for name in _STRING_FIELDS
+                ):
+                    raise ValueError
+                records.append(
+                    InvoiceRecord(
+                        **{name: strings[name][i] for name in _STRING_FIELDS},
+                        invoice_date=dates[i],
+                        net_amount=nets[i],
+                        tax_amount=taxes[i],
+                        total_amount=totals[i],
+                        currency=currencies[i],
+                        source_file=source_name,
+                        processed_at=processed_at,
+                    )
+                )
+            except Exception:
+                # Camino lento solo para filas inválidas: mismo error que transform_row
+                try:
+                    records.append(self.transform_row(df.iloc[i].to_dict(), source_name))
+                except Exception as e:
+                    errors.append((idx, e))
+        return records, errors
+
+    def _transform_rows(
+        self, df: pd.DataFrame, source_name: str
+    ) -> tuple[list[InvoiceRecord], list[tuple[Hashable, Exception]]]:
+        records: list[InvoiceRecord] = []
+        errors: list[tuple[Hashable, Exception]] = []
+        # Tuplas por fila en lugar de una Series por fila (iterrows + to_dict)
+        headers = list(df.columns)
+        for idx, values in zip(df.index, df.itertuples(index=False, name=None)):
+            try:
+                records.append(self.transform_row(dict(zip(headers, values)), source_name))
+            except Exception as e:
+                errors.append((idx, e))
+        return records, errors
+
+    def _map_columns(self, headers: Any) -> dict[str, Hashable]:
+        """Nombre estándar -> encabezado del DataFrame, igual que _apply_column_mapping."""
+        return self._column_plan(tuple(headers))
+
     def _apply_column_mapping(self, row: dict) -> dict:
-        result = {}
+        return {standard: row[col] for standard, col in self._column_plan(tuple(row)).items()}
+
+    def _column_plan(self, headers: tuple[Hashable, ...]) -> dict[str, Hashable]:
+        """Nombre estándar -> encabezado de origen, con coincidencia exacta.
+
+        Recorre column_mapping en orden: el encabezado original tiene prioridad sobre
+        la columna ya estandarizada y una entrada posterior reemplaza a una anterior.
+        """
+        try:
+            return self._plan_cache[headers]
+        except KeyError:
+            pass
+        present = set(headers)
+        plan: dict[str, Hashable] = {}
         for original_col, standard_name in self.column_map.items():
-            if original_col in row:
-                result[standard_name] = row[original_col]
-            elif standard_name in row:
-                result[standard_name] = row[standard_name]
-        return result
+            if original_col in present:
+                plan[standard_name] = original_col
+            elif standard_name in present:
+                plan[standard_name] = standard_name
+        self._plan_cache[headers] = plan
+        return plan
+
+    def _intern(self, value: str) -> str:
+        return self._string_pool.setdefault(value, value)
 
     @staticmethod
     def _clean_string(value: object) -> str:
@@ -60,11 +212,19 @@ class RowTransformer:
         if isinstance(value, datetime):
             return value.date()
         s = str(value).strip()
-        for fmt in [self.config.date_format, "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]:
+        try:
+            return datetime.strptime(s, self._last_date_format).date()
+        except ValueError:
+            pass
+        for fmt in self._date_formats:
+            if fmt == self._last_date_format:
+                continue
             try:
-                return datetime.strptime(s, fmt).date()
+                parsed = datetime.strptime(s, fmt).date()
             except ValueError:
                 continue
+            self._last_date_format = fmt
+            return parsed
         raise ValueError(f"Formato de fecha no reconocido: '{value}'")
 
     @staticmethod
@@ -73,29 +233,59 @@ class RowTransformer:
             return value
         if isinstance(value, (int, float)):
             return Decimal(str(value))
-        s = str(value).strip()
-        # Remove currency symbols and whitespace
-        s = s.replace("$", "").replace(" ", "")
-        # Detect Chilean format (1.234.567) vs US format (1,234.56)
-        if "." in s and "," in s:
-            if s.rindex(".") > s.rindex(","):
-                # 1,234.56 — US format
+        # Quitar símbolo de moneda y espacios en una sola pasada (C)
+        s = str(value).strip().translate(_MONEY_STRIP)
+        dots = s.count(".")
+        commas = s.count(",")
+        # Detectar formato chileno (1.234.567) vs US (1,234.56)
+        if dots and commas:
+            if s.rfind(".") > s.rfind(","):
+                # 1,234.56 — formato US
                 s = s.replace(",", "")
             else:
-                # 1.234,56 — Chilean/European format
+                # 1.234,56 — formato chileno/europeo
                 s = s.replace(".", "").replace(",", ".")
-        elif "," in s and s.count(",") == 1:
-            # Could be decimal: 1234,56
+        elif commas == 1:
+            # Decimal con coma: 1234,56
             s = s.replace(",", ".")
-        elif "." in s and s.count(".") > 1:
-            # Multiple dots = thousands separators: 1.234.567
+        elif dots > 1:
+            # Varios puntos = separadores de miles: 1.234.567
+            s = s.replace(".", "")
+        elif dots == 1 and len(s) - s.index(".") == 4:
+            # Un punto con exactamente 3 dígitos después = miles chilenos (12.345 → 12345)
             s = s.replace(".", "")
-        elif "." in s and s.count(".") == 1:
-            # Single dot with exactly 3 trailing digits = Chilean thousands (12.345 → 12345)
-            parts = s.split(".")
-            if len(parts[1]) == 3:
-                s = s.replace(".", "")
         try:
             return Decimal(s)
         except InvalidOperation as e:
             raise ValueError(f"Monto inválido: '{value}'") from e
+
+
+def _convert_unique(values: list[Any], convert: Callable[[Any], Any]) -> list[Any]:
+    """Aplica convert una vez por valor distinto; los fallos quedan marcados con _FAILED.
+
+    La clave incluye el tipo: 1, 1.0 y True son iguales como claves de dict pero
+    str() y las conversiones los tratan distinto.
+    """
+    cache: dict[tuple[type, Any], Any] = {}
+    out: list[Any] = []
+    for value in values:
+        key = (type(value), value)
+        try:
+            out.append(cache[key])
+            continue
+        except KeyError:
+            pass
+        except TypeError:  # valor no hasheable: se convierte sin caché
+            out.append(_try_convert(convert, value))
+            continue
+        result = cache[key] = _try_convert(convert, value)
+        out.append(result)
+    return out
+
+
+def _try_convert(convert: Callable[[Any], Any], value: Any) -> Any:
+    """Solo los errores de conversión marcan _FAILED; cualquier otro error se propaga."""
+    try:
+        return convert(value)
+    except _CONVERSION_ERRORS:
+        return _FAILED
@@ -1,10 +1,21 @@
 """Caso de uso principal: consolida facturas desde archivos XLSX en Google Drive."""
 
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from decimal import Decimal
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
+from typing import Any
+import logging
+import os
+import shutil
+import tempfile
+import time
 import uuid
 
+import numpy as np
 import pandas as pd
 import structlog
 
@@ -23,6 +34,45 @@ from src.infrastructure.official_format_extractor import OfficialFormatExtractor
 
 logger = structlog.get_logger()
 
+# Columna del consolidado -> campo de InvoiceRecord, en el orden de la hoja
+CONSOLIDATED_COLUMNS = {
+    "N° Factura": "invoice_number",
+    "Empresa Transporte": "carrier_name",
+    "Nave": "ship_name",
+    "Órdenes de Embarque": "reference_number",
+    "Guías de Despacho": "dispatch_guides",
+    "Total Servicio ($)": "total_amount",
+    "Fecha Emisión": "invoice_date",
+    "Fecha Recepción Digital": "fecha_recepcion_digital",
+    "Aprobado por:": "aprobado_por",
+    "Estado Operaciones": "estado_operaciones",
+    "Fecha Aprobación Operaciones": "fecha_aprobacion_operaciones",
+    "Observaciones": "description",
+}
+_TOTAL_COLUMN = "Total Servicio ($)"
+_CONSOLIDATED_GETTERS = {
+    column: attrgetter(field_name) for column, field_name in CONSOLIDATED_COLUMNS.items()
+}
+
+# Tolerancia de reconciliación (CLP) entre el total fuente y el total consolidado
+RECONCILE_TOLERANCE = Decimal("1")
+_ZERO = Decimal("0")
+
+# Subcarpeta temporal de cada ejecución en downloads.temp_path
+_RUN_DIR_PREFIX = "run_"
+# Una subcarpeta de ejecución más antigua que esto quedó de una ejecución interrumpida
+STALE_RUN_DIR_SECONDS = 24 * 60 * 60
+
+# Acción registrada en record_log según el estado del registro en el consolidado
+STATUS_TO_ACTION = {
+    RecordStatus.NEW: "INSERT",
+    RecordStatus.UPDATED: "UPDATE",
+    RecordStatus.UNCHANGED: "UNCHANGED",
+}
+
+# Registros de record_log acumulados antes de escribirlos al tracker en un solo lote
+RECORD_LOG_FLUSH_SIZE = 10_000
+
 TEMPLATE_MAP = {
     "SUCCESS": "success",
     "PARTIAL": "partial",
@@ -30,6 +80,40 @@ TEMPLATE_MAP = {
     "NO_FILES": "empty",
 }
 
+# Etiqueta del estado en el asunto del email
+STATUS_LABELS = {
+    "SUCCESS": "EXITOSO",
+    "PARTIAL": "ADVERTENCIA",
+    "ERROR": "ERROR",
+    "NO_FILES": "SIN ARCHIVOS",
+}
+
+
+@dataclass(frozen=True)
+class _ProcessedFile:
+    """Archivo fuente procesado cuyas inserciones esperan la escritura del consolidado."""
+
+    source_file: dict
+    file_log_id: int
+    rows_total: int
+    rows_error: int
+    upsert: UpsertResult
+    # Totales reconciliados; se suman al reporte solo si el consolidado se escribe
+    source_total: Decimal
+    output_total: Decimal
+
+
+@dataclass
+class _ConsolidatedState:
+    """Consolidado en memoria durante una ejecución: se descarga y parsea una sola vez."""
+
+    temp_dir: Path  # subcarpeta de descargas propia de esta ejecución
+    records: dict[tuple, InvoiceRecord] | None = None
+    local_path: Path | None = None  # copia local descargada, base de la escritura final
+    prefetch: Future[list[InvoiceRecord]] | None = None  # lectura anticipada en el pool
+    processed: list[_ProcessedFile] = field(default_factory=list)
+    pending_logs: list[dict] = field(default_factory=list)  # record_log aún no escrito
+
 
 @dataclass(frozen=True)
 class ConsolidateInvoicesUseCase:
@@ -50,6 +134,8 @@ class ConsolidateInvoicesUseCase:
 
         # Limpiar carpeta de descargas antes de iniciar
         self._clean_downloads_folder()
+        # Archivos temporales de esta ejecución en su propia subcarpeta única
+        temp_dir = Path(tempfile.mkdtemp(prefix=_RUN_DIR_PREFIX, dir=self._downloads_path))
 
         try:
             self.tracker.start_run(run_id)
@@ -83,6 +169,15 @@ class ConsolidateInvoicesUseCase:
             consolidated_file_id = self.drive.find_file_in_folder(
                 consolidated_folder_id, self.config.drive.consolidated_filename
             )
+            if not consolidated_file_id and self.path_resolver.invalidate(
+                self.config.drive.source_path
+            ):
+                # Folder IDs en caché obsoletos (carpetas movidas): resolver de nuevo en Drive
+                source_folder_id = self.path_resolver.ensure_path(self.config.drive.source_path)
+                consolidated_folder_id = self.path_resolver.ensure_path(consolidated_full_path)
+                consolidated_file_id = self.drive.find_file_in_folder(
+                    consolidated_folder_id, self.config.drive.consolidated_filename
+                )
             if not consolidated_file_id:
                 raise FileNotFoundError(
                     f"Consolidado '{self.config.drive.consolidated_filename}' "
@@ -99,18 +194,19 @@ class ConsolidateInvoicesUseCase:
                 logger.debug(f"{'=' * 80}\n")
                 return report
 
-            logger.debug(
-                "debug_files_found",
-                count=len(source_files),
-                files=[f["name"] for f in source_files],
-            )
-            logger.debug(f"{'=' * 80}\n")
+            if logger.is_enabled_for(logging.DEBUG):
+                logger.debug(
+                    "debug_files_found",
+                    count=len(source_files),
+                    files=[f["name"] for f in source_files],
+                )
+                logger.debug(f"{'=' * 80}\n")
 
-            logger.debug(f"{'=' * 80}")
-            logger.debug("DEBUG: Archivos encontrados en carpeta de origen:")
-            for f in source_files:
-                logger.debug(f"  → {f['name']} (ID: {f['file_id']})")
-            logger.debug(f"{'=' * 80}\n")
+                logger.debug(f"{'=' * 80}")
+                logger.debug("DEBUG: Archivos encontrados en carpeta de origen:")
+                for f in source_files:
+                    logger.debug(f"  → {f['name']} (ID: {f['file_id']})")
+                logger.debug(f"{'=' * 80}\n")
 
             report.source_files = [f["name"] for f in source_files]
             report.total_files = len(source_files)
@@ -127,19 +223,53 @@ class ConsolidateInvoicesUseCase:
             # Inicializar transformer de filas
             transformer = RowTransformer(self.config.excel)
 
-            for source_file in source_files:
-                self._process_file(
-                    source_file,
-                    source_folder_id,
-                    consolidated_file_id,
-                    transformer,
-                    run_id,
-                    report,
+            # Idempotencia por (nombre, modified_time) en una sola consulta, antes de descargar
+            pending_files = self._filter_unprocessed(source_files)
+
+            consolidated = _ConsolidatedState(temp_dir=temp_dir)
+
+            # Descarga + extracción de cada archivo fuente en paralelo (independientes entre sí);
+            # upsert, tracker y reporte siguen secuenciales en este hilo
+            with ThreadPoolExecutor(max_workers=self.config.downloads.max_workers) as pool:
+                # El consolidado se descarga y parsea mientras se descargan los archivos fuente
+                if pending_files:
+                    consolidated.local_path = self._new_temp_path(temp_dir, ".xlsx")
+                    consolidated.prefetch = pool.submit(
+                        self._read_consolidated_records,
+                        consolidated_file_id,
+                        consolidated.local_path,
+                        transformer,
+                    )
+                extractions = {
+                    f["file_id"]: pool.submit(self._download_and_extract_source, f, temp_dir)
+                    for f in pending_files
+                }
+                for source_file in pending_files:
+                    self._process_file(
+                        source_file,
+                        extractions[source_file["file_id"]],
+                        source_folder_id,
+                        consolidated_file_id,
+                        consolidated,
+                        transformer,
+                        run_id,
+                        report,
+                    )
+
+            # Una sola escritura + subida del consolidado con las inserciones de todos los archivos
+            try:
+                self._write_consolidated(
+                    consolidated, consolidated_file_id, source_folder_id, report
                 )
+            finally:
+                if consolidated.local_path is not None:
+                    consolidated.local_path.unlink(missing_ok=True)
+                self._flush_record_logs(consolidated)
 
+            # Los archivos ya procesados en otra ejecución no cuentan: solo los intentados
             if not report.files_with_errors:
                 report.status = "SUCCESS"
-            elif len(report.files_with_errors) < len(source_files):
+            elif len(report.files_with_errors) < len(pending_files):
                 report.status = "PARTIAL"
             else:
                 report.status = "ERROR"
@@ -155,68 +285,100 @@ class ConsolidateInvoicesUseCase:
                     logger.error("rollback_failed", error=str(rb_err))
 
         finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
             self._finish(run_id, report)
 
         return report
 
+    @property
+    def _downloads_path(self) -> Path:
+        return Path(self.config.downloads.temp_path)
+
     def _clean_downloads_folder(self) -> None:
-        """Limpia la carpeta de descargas antes de iniciar una nueva ejecución."""
-        downloads_path = Path(self.config.downloads.temp_path)
-
-        if downloads_path.exists():
-            # Eliminar todos los archivos en la carpeta (pero no la carpeta misma)
-            for file in downloads_path.iterdir():
-                if file.is_file():
-                    try:
-                        file.unlink()
-                        logger.debug("debug_deleted_old_file", path=str(file))
-                    except Exception as e:
-                        logger.warning("warn_failed_to_delete_file", path=str(file), error=str(e))
-
-            logger.info("downloads_folder_cleaned", path=str(downloads_path))
-        else:
+        """Elimina subcarpetas de ejecución abandonadas antes de iniciar una nueva.
+
+        Solo se borran run_* sin cambios en STALE_RUN_DIR_SECONDS (ejecuciones
+        interrumpidas): las de ejecuciones simultáneas y otros archivos no se tocan.
+        """
+        downloads_path = self._downloads_path
+
+        if not downloads_path.exists():
             # Crear la carpeta si no existe
             downloads_path.mkdir(parents=True, exist_ok=True)
             logger.debug("downloads_folder_created", path=str(downloads_path))
+            return
+
+        cutoff = time.time() - STALE_RUN_DIR_SECONDS
+        removed = 0
+        # scandir entrega el tipo de cada entrada sin un stat adicional por archivo
+        with os.scandir(downloads_path) as entries:
+            for entry in entries:
+                if not entry.name.startswith(_RUN_DIR_PREFIX):
+                    continue
+                try:
+                    if not entry.is_dir(follow_symlinks=False) or entry.stat().st_mtime > cutoff:
+                        continue
+                    shutil.rmtree(entry.path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning("warn_failed_to_delete_run_dir", path=entry.path, error=str(e))
+
+        logger.info("downloads_folder_cleaned", path=str(downloads_path), removed=removed)
 
     def _process_file(
         self,
         source_file: dict,
+        extraction: Future[tuple[list[InvoiceRecord], list[dict]]],
         source_folder_id: str,
         consolidated_file_id: str,
+        consolidated: _ConsolidatedState,
         transformer: RowTransformer,
         run_id: str,
         report: ExecutionReport,
     ) -> None:
-        """Orquestador principal que coordina el procesamiento de un archivo."""
+        """Orquestador principal que coordina el procesamiento de un archivo.
+
+        La idempotencia se verifica antes, en execute; extraction es la descarga
+        y extracción del archivo fuente ya lanzada en el pool. Las inserciones
+        quedan en consolidated y se escriben al final en _write_consolidated.
+        """
         file_log_id: int | None = None
         try:
-            # 1. Verificar si el archivo ya fue procesado (idempotencia)
-            if self._is_file_already_processed(source_file):
-                return
-
             # 2. Iniciar procesamiento: loguear inicio y mover a carpeta "en proceso"
             file_log_id = self._initiate_file_processing(source_file, run_id, source_folder_id)
 
-            # 3. Descargar archivo fuente y extraer registros
-            source_records, row_errors = self._download_and_extract_source(source_file)
+            # 3. Esperar la descarga y extracción del archivo fuente
+            source_records, row_errors = extraction.result()
 
             # 4. Validar registros fuente y actualizar reporte
             self._validate_source_records(source_records, row_errors, file_log_id, report)
 
-            # 5. Descargar y leer archivo consolidado
-            df_consolidated = self._download_consolidated(consolidated_file_id)
+            # 5. Obtener registros del consolidado (descarga y parseo solo la primera vez)
+            existing_map = self._load_consolidated(consolidated, consolidated_file_id, transformer)
 
-            # 6. Convertir consolidado a registros y realizar upsert
+            # 6. Realizar upsert contra el consolidado en memoria
             upsert_result = self._merge_and_upsert(
-                df_consolidated, source_records, transformer, run_id, file_log_id, row_errors
+                consolidated, source_records, run_id, file_log_id, row_errors
             )
 
-            # 7. Reconciliar y escribir resultados
-            self._reconcile_and_write(source_records, upsert_result, consolidated_file_id, report)
-
-            # 8. Finalizar: mover a backup y loguear completitud
-            self._finalize_file_processing(source_file, file_log_id, source_records, row_errors)
+            # 7. Reconciliar y registrar inserciones pendientes de escritura
+            source_total, output_total = self._reconcile(
+                source_records, existing_map, upsert_result
+            )
+            existing_map.update(upsert_result.new_by_pk)
+
+            # 8. Finalizar (mover a backup y loguear completitud) tras escribir el consolidado
+            consolidated.processed.append(
+                _ProcessedFile(
+                    source_file=source_file,
+                    file_log_id=file_log_id,
+                    rows_total=len(source_records),
+                    rows_error=len(row_errors),
+                    upsert=upsert_result,
+                    source_total=source_total,
+                    output_total=output_total,
+                )
+            )
 
         except SchemaValidationError as e:
             report.files_with_errors.append(source_file["name"])
@@ -232,12 +394,25 @@ class ConsolidateInvoicesUseCase:
             if file_log_id is not None:
                 self.tracker.log_file_finish(file_log_id, "ERROR", 0, 0, 0, str(e))
 
-    def _is_file_already_processed(self, source_file: dict) -> bool:
-        """Verifica si el archivo ya fue procesado previamente (idempotencia)."""
-        if self.tracker.is_file_processed(source_file["name"], source_file["modified_time"]):
-            logger.info("file_skipped_idempotent", name=source_file["name"])
-            return True
-        return False
+    @staticmethod
+    def _new_temp_path(temp_dir: Path, suffix: str) -> Path:
+        """Crea un archivo vacío de nombre único en la subcarpeta de la ejecución.
+
+        Evita colisiones entre descargas concurrentes con el mismo nombre; la subcarpeta
+        propia aísla además a ejecuciones simultáneas que comparten la carpeta de descargas.
+        """
+        fd, name = tempfile.mkstemp(suffix=suffix, dir=temp_dir)
+        os.close(fd)
+        return Path(name)
+
+    def _filter_unprocessed(self, source_files: list[dict]) -> list[dict]:
+        """Excluye los archivos ya procesados previamente (idempotencia)."""
+        pending = self.tracker.filter_unprocessed(source_files)
+        pending_ids = {f["file_id"] for f in pending}
+        for source_file in source_files:
+            if source_file["file_id"] not in pending_ids:
+                logger.info("file_skipped_idempotent", name=source_file["name"])
+        return pending
 
     def _initiate_file_processing(
         self, source_file: dict, run_id: str, source_folder_id: str
@@ -261,35 +436,41 @@ class ConsolidateInvoicesUseCase:
         return file_log_id
 
     def _download_and_extract_source(
-        self, source_file: dict
+        self, source_file: dict, temp_dir: Path
     ) -> tuple[list[InvoiceRecord], list[dict]]:
-        """Descarga el archivo fuente desde Drive y extrae los registros."""
-        logger.debug(f"  → Descargando de Google Drive...")
+        """Descarga el archivo fuente desde Drive y extrae los registros.
 
-        local_source = Path(f"{self.config.downloads.temp_path}/{source_file['name']}")
-        local_source.parent.mkdir(parents=True, exist_ok=True)
-        self.drive.download_file(source_file["file_id"], local_source)
-        logger.debug("debug_file_downloaded", path=str(local_source))
-        logger.debug(f"  → Archivo descargado en: {local_source}")
-        logger.debug(f"  → Extrayendo datos del Excel (hoja: {self.config.excel.source_sheet})...")
+        Se ejecuta en un hilo del pool: no modifica el reporte ni usa el tracker.
+        """
+        local_source = self._new_temp_path(temp_dir, Path(source_file["name"]).suffix)
+        try:
+            self.drive.download_file(source_file["file_id"], local_source)
+            logger.debug("debug_file_downloaded", path=str(local_source))
+            logger.debug(f"  → Archivo descargado en: {local_source}")
+            logger.debug(
+                f"  → Extrayendo datos del Excel (hoja: {self.config.excel.source_sheet})..."
+            )
 
-        extractor = OfficialFormatExtractor(self.config.excel)
-        source_records = extractor.extract(local_source)
-        row_errors = extractor.validation_errors
+            extractor = OfficialFormatExtractor(self.config.excel)
+            source_records = extractor.extract(local_source)
+            row_errors = extractor.validation_errors
+        finally:
+            local_source.unlink(missing_ok=True)
 
-        logger.debug(
-            "debug_extraction_result",
-            records=len(source_records),
-            errors=len(row_errors),
-        )
-        logger.debug(f"  → Registros extraídos: {len(source_records)}")
-        if source_records:
-            logger.debug(f"  → Primer registro: {source_records[0]}")
-        if row_errors:
-            logger.debug(f"  → Errores de validación: {len(row_errors)}")
-            for err in row_errors[:3]:
-                logger.debug(f"      - {err}")
-        logger.debug("=" * 80 + "\n")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(
+                "debug_extraction_result",
+                records=len(source_records),
+                errors=len(row_errors),
+            )
+            logger.debug(f"  → Registros extraídos: {len(source_records)}")
+            if source_records:
+                logger.debug(f"  → Primer registro: {source_records[0]}")
+            if row_errors:
+                logger.debug(f"  → Errores de validación: {len(row_errors)}")
+                for err in row_errors[:3]:
+                    logger.debug(f"      - {err}")
+            logger.debug("=" * 80 + "\n")
 
         return source_records, row_errors
 
@@ -309,19 +490,56 @@ class ConsolidateInvoicesUseCase:
         report.valid_row_count += len(source_records)
         report.validation_errors.extend(row_errors)
 
-    def _download_consolidated(self, consolidated_file_id: str) -> pd.DataFrame:
+    def _load_consolidated(
+        self,
+        consolidated: _ConsolidatedState,
+        consolidated_file_id: str,
+        transformer: RowTransformer,
+    ) -> dict[tuple, InvoiceRecord]:
+        """Retorna los registros del consolidado por clave primaria, descargándolo una vez.
+
+        Usa la lectura anticipada lanzada en execute si existe. Si la descarga o el
+        parseo fallan, el error afecta solo al archivo en curso y el siguiente
+        archivo reintenta la carga.
+        """
+        if consolidated.records is None:
+            prefetch, consolidated.prefetch = consolidated.prefetch, None
+            if prefetch is not None:
+                records = prefetch.result()
+            else:
+                if consolidated.local_path is None:
+                    consolidated.local_path = self._new_temp_path(consolidated.temp_dir, ".xlsx")
+                records = self._read_consolidated_records(
+                    consolidated_file_id, consolidated.local_path, transformer
+                )
+            consolidated.records = {r.primary_key: r for r in records}
+        return consolidated.records
+
+    def _read_consolidated_records(
+        self, consolidated_file_id: str, local_path: Path, transformer: RowTransformer
+    ) -> list[InvoiceRecord]:
+        """Descarga y parsea el consolidado; puede ejecutarse en un hilo del pool."""
+        df_consolidated = self._download_consolidated(consolidated_file_id, local_path)
+        records = self._dataframe_to_records(df_consolidated, transformer)
+        logger.debug(f"  → Registros parseados: {len(records)}")
+        return records
+
+    def _download_consolidated(
+        self, consolidated_file_id: str, local_consolidated: Path
+    ) -> pd.DataFrame:
         """Descarga el archivo consolidado desde Drive y lo retorna como DataFrame."""
-        local_consolidated = Path(f"{self.config.downloads.temp_path}/consolidado.xlsx")
-        local_consolidated.parent.mkdir(parents=True, exist_ok=True)
         logger.debug("debug_downloading_consolidated")
         logger.debug(f"  → Descargando archivo consolidado...")
         self.drive.download_file(consolidated_file_id, local_consolidated)
         logger.debug(f"  → Leyendo hoja: {self.config.excel.consolidated_sheet}")
 
+        # Solo las columnas mapeadas a campos de InvoiceRecord (pushdown de columnas)
+        column_lookup = self.config.excel.column_lookup
         df_consolidated = self.reader.read(
             local_consolidated,
             self.config.excel.consolidated_sheet,
             header_row=self.config.excel.header_row,
+            usecols=lambda header: header in column_lookup,
         )
         logger.debug("debug_consolidated_read", rows=len(df_consolidated))
         logger.debug(f"  → Registros en consolidado: {len(df_consolidated)}")
@@ -330,38 +548,40 @@ class ConsolidateInvoicesUseCase:
 
     def _merge_and_upsert(
         self,
-        df_consolidated: pd.DataFrame,
+        consolidated: _ConsolidatedState,
         source_records: list[InvoiceRecord],
-        transformer: RowTransformer,
         run_id: str,
         file_log_id: int,
         row_errors: list[dict],
     ) -> UpsertResult:
-        """Convierte consolidado a registros, realiza upsert y loguea resultados."""
-        consolidated_records = self._dataframe_to_records(df_consolidated, transformer)
-        logger.debug(f"  → Registros parseados: {len(consolidated_records)}")
-        logger.debug("=" * 80 + "\n")
-
-        upsert_result = self._upsert(consolidated_records, source_records)
-        self._log_upsert_records(run_id, file_log_id, source_records, upsert_result)
-
-        logger.debug(
-            "debug_upsert_result",
-            filename=None,
-            inserted=upsert_result.inserted,
-            updated=upsert_result.updated,
-            unchanged=upsert_result.unchanged,
+        """Realiza upsert contra el consolidado en memoria y encola los logs de registros."""
+        existing_map = consolidated.records or {}
+        upsert_result = self._upsert(existing_map, source_records)
+        self._queue_record_logs(
+            consolidated,
+            self._upsert_record_logs(
+                run_id, file_log_id, source_records, existing_map, upsert_result
+            ),
         )
-        logger.debug("\n" + "=" * 80)
-        logger.debug(f"DEBUG: Resultado del upsert:")
-        logger.debug(f"  → Insertados: {upsert_result.inserted}")
-        logger.debug(f"  → Actualizados: {upsert_result.updated}")
-        logger.debug(f"  → Sin cambios: {upsert_result.unchanged}")
-        logger.debug("=" * 80 + "\n")
+
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(
+                "debug_upsert_result",
+                filename=None,
+                inserted=upsert_result.inserted,
+                updated=upsert_result.updated,
+                unchanged=upsert_result.unchanged,
+            )
+            logger.debug("\n" + "=" * 80)
+            logger.debug(f"DEBUG: Resultado del upsert:")
+            logger.debug(f"  → Insertados: {upsert_result.inserted}")
+            logger.debug(f"  → Actualizados: {upsert_result.updated}")
+            logger.debug(f"  → Sin cambios: {upsert_result.unchanged}")
+            logger.debug("=" * 80 + "\n")
 
         # Log validation errors to tracker
         if row_errors:
-            error_batch = [
+            error_rows = (
                 {
                     "run_uuid": run_id,
                     "file_log_id": file_log_id,
@@ -372,128 +592,172 @@ class ConsolidateInvoicesUseCase:
                     "error_message": err["error"],
                 }
                 for err in row_errors
-            ]
-            self.tracker.log_records_batch(error_batch)
+            )
+            self._queue_record_logs(consolidated, error_rows)
 
         return upsert_result
 
-    def _reconcile_and_write(
+    def _queue_record_logs(self, consolidated: _ConsolidatedState, rows: Iterable[dict]) -> None:
+        """Acumula logs de registros entre archivos; escribe al llegar a RECORD_LOG_FLUSH_SIZE.
+
+        rows se consume por tramos: nunca hay más de RECORD_LOG_FLUSH_SIZE filas en memoria.
+        """
+        rows = iter(rows)
+        while chunk := list(
+            islice(rows, RECORD_LOG_FLUSH_SIZE - len(consolidated.pending_logs))
+        ):
+            consolidated.pending_logs.extend(chunk)
+            if len(consolidated.pending_logs) >= RECORD_LOG_FLUSH_SIZE:
+                self._flush_record_logs(consolidated)
+
+    def _flush_record_logs(self, consolidated: _ConsolidatedState) -> None:
+        """Escribe los logs de registros pendientes en una sola transacción del tracker."""
+        if consolidated.pending_logs:
+            self.tracker.log_records_batch(consolidated.pending_logs)
+            consolidated.pending_logs = []
+
+    def _write_consolidated(
         self,
-        source_records: list[InvoiceRecord],
-        upsert_result: UpsertResult,
+        consolidated: _ConsolidatedState,
         consolidated_file_id: str,
+        source_folder_id: str,
         report: ExecutionReport,
     ) -> None:
-        """Realiza reconciliación, escribe nuevos registros y actualiza Drive."""
-        self._reconcile(report, source_records, upsert_result)
+        """Escribe y sube el consolidado una sola vez, luego finaliza cada archivo procesado.
 
-        new_records = [r for r in upsert_result.all_records if r.status == RecordStatus.NEW]
+        Si la escritura o la subida fallan no queda ninguna inserción persistida: los
+        archivos de la ejecución vuelven a la carpeta fuente con estado ERROR y se
+        reprocesan en la siguiente ejecución.
+        """
+        new_records = [r for p in consolidated.processed for r in p.upsert.new_records]
         df_inserts = self._records_to_dataframe(new_records)
 
         if not df_inserts.empty:
-            local_consolidated = Path(f"{self.config.downloads.temp_path}/consolidado.xlsx")
-            self.writer.write(
-                df_inserts,
-                local_consolidated,
-                self.config.excel.consolidated_sheet,
-                header_row=self.config.excel.header_row,
-                data_start_row=self.config.excel.data_start_row,
-            )
-            self.drive.update_file(consolidated_file_id, local_consolidated)
+            try:
+                self.writer.write(
+                    df_inserts,
+                    consolidated.local_path,
+                    self.config.excel.consolidated_sheet,
+                    header_row=self.config.excel.header_row,
+                    data_start_row=self.config.excel.data_start_row,
+                )
+                self.drive.update_file(consolidated_file_id, consolidated.local_path)
+            except Exception as e:
+                logger.error("consolidated_write_error", error=str(e))
+                self._fail_processed_files(consolidated, source_folder_id, report, e)
+                return
+
+        for processed in consolidated.processed:
+            report.inserted_count += processed.upsert.inserted
+            report.updated_count += processed.upsert.updated
+            report.unchanged_count += processed.upsert.unchanged
+            report.source_total_amount += processed.source_total
+            report.output_total_amount += processed.output_total
 
-        report.inserted_count += upsert_result.inserted
-        report.updated_count += upsert_result.updated
-        report.unchanged_count += upsert_result.unchanged
+        # Todos los movimientos a backup en requests batch; los errores quedan por archivo
+        file_ids = [p.source_file["file_id"] for p in consolidated.processed]
+        try:
+            move_errors = self.lifecycle.move_many_to_backup(file_ids) if file_ids else {}
+        except Exception as e:
+            move_errors = dict.fromkeys(file_ids, e)
 
-    def _finalize_file_processing(
+        for processed in consolidated.processed:
+            try:
+                move_error = move_errors.get(processed.source_file["file_id"])
+                if isinstance(move_error, Exception):
+                    raise move_error
+                self._finalize_file_processing(processed)
+            except Exception as e:
+                report.files_with_errors.append(processed.source_file["name"])
+                logger.error(
+                    "file_processing_error", file=processed.source_file["name"], error=str(e)
+                )
+                self.tracker.log_file_finish(processed.file_log_id, "ERROR", 0, 0, 0, str(e))
+
+    def _fail_processed_files(
         self,
-        source_file: dict,
-        file_log_id: int,
-        source_records: list[InvoiceRecord],
-        row_errors: list[dict],
+        consolidated: _ConsolidatedState,
+        source_folder_id: str,
+        report: ExecutionReport,
+        error: Exception,
     ) -> None:
-        """Finaliza el procesamiento: mueve archivo a backup y loguea completitud."""
-        self.lifecycle.move_to_backup(source_file["file_id"])
+        """Marca en ERROR los archivos cuyas inserciones no se escribieron y los devuelve
+        a la carpeta fuente."""
+        failed_logs = {p.file_log_id for p in consolidated.processed}
+        # Los INSERT aún no escritos al tracker pasan a WRITE_ERROR: la fila no se persistió
+        for row in consolidated.pending_logs:
+            if row["action"] == "INSERT" and row["file_log_id"] in failed_logs:
+                row["action"] = "WRITE_ERROR"
+                row["error_message"] = str(error)
+
+        file_ids = [p.source_file["file_id"] for p in consolidated.processed]
+        try:
+            move_errors = self.lifecycle.move_many_to_source(file_ids, source_folder_id)
+        except Exception as e:
+            move_errors = dict.fromkeys(file_ids, e)
+
+        for processed in consolidated.processed:
+            report.files_with_errors.append(processed.source_file["name"])
+            move_error = move_errors.get(processed.source_file["file_id"])
+            if move_error is not None:
+                logger.error(
+                    "file_return_to_source_failed",
+                    file=processed.source_file["name"],
+                    error=str(move_error),
+                )
+            self.tracker.log_file_finish(processed.file_log_id, "ERROR", 0, 0, 0, str(error))
 
+    def _finalize_file_processing(self, processed: _ProcessedFile) -> None:
+        """Loguea la completitud de un archivo ya movido a backup."""
         self.tracker.log_file_finish(
-            file_log_id,
+            processed.file_log_id,
             "COMPLETED",
-            rows_total=len(source_records),
-            rows_valid=len(source_records),
-            rows_error=len(row_errors),
+            rows_total=processed.rows_total,
+            rows_valid=processed.rows_total,
+            rows_error=processed.rows_error,
             error_message=None,
         )
 
-    def _validate_and_transform(
-        self,
-        df: pd.DataFrame,
-        source_name: str,
-        transformer: RowTransformer,
-        run_uuid: str,
-        file_log_id: int,
-    ) -> tuple[list[InvoiceRecord], list[dict]]:
-        records: list[InvoiceRecord] = []
-        errors: list[dict] = []
-        error_batch: list[dict] = []
-
-        for idx, row in df.iterrows():
-            try:
-                record = transformer.transform_row(row, source_name)
-                records.append(record)
-            except ValueError as e:
-                errors.append({"file": source_name, "row_index": idx, "error": str(e)})
-                error_batch.append(
-                    {
-                        "run_uuid": run_uuid,
-                        "file_log_id": file_log_id,
-                        "row_index": int(idx),
-                        "invoice_number": None,
-                        "reference_number": None,
-                        "action": "VALIDATION_ERROR",
-                        "error_message": str(e),
-                    }
-                )
-            except Exception as e:
-                errors.append({"file": source_name, "row_index": idx, "error": str(e)})
-                error_batch.append(
-                    {
-                        "run_uuid": run_uuid,
-                        "file_log_id": file_log_id,
-                        "row_index": int(idx),
-                        "invoice_number": None,
-                        "reference_number": None,
-                        "action": "TRANSFORM_ERROR",
-                        "error_message": str(e),
-                    }
-                )
-
-        if error_batch:
-            self.tracker.log_records_batch(error_batch)
-
-        return records, errors
-
     def _upsert(
         self,
-        existing: list[InvoiceRecord],
+        existing_map: dict[tuple, InvoiceRecord],
         incoming: list[InvoiceRecord],
     ) -> UpsertResult:
-        existing_map: dict[tuple, InvoiceRecord] = {r.primary_key: r for r in existing}
+        """Calcula las inserciones sin modificar existing_map (se aplica tras reconciliar)."""
         result = UpsertResult()
+        inserted = result.new_by_pk
 
-        logger.debug("upsert_start", existing_count=len(existing), incoming_count=len(incoming))
+        logger.debug("upsert_start", existing_count=len(existing_map), incoming_count=len(incoming))
+
+        if not incoming:
+            return result
+        if not existing_map:
+            # Consolidado vacío (primera carga): todo es nuevo salvo PKs repetidas en la fuente
+            for record in incoming:
+                inserted.setdefault(record.primary_key, record)
+            result.new_records = list(inserted.values())
+            result.inserted = len(result.new_records)
+            logger.debug("upsert_all_new", inserted=result.inserted)
+            return result
+
+        # Los argumentos del log por registro se evalúan solo si DEBUG está activo
+        debug = logger.is_enabled_for(logging.DEBUG)
 
         # Solo insertar nuevos registros, ignorar actualizaciones
         for record in incoming:
             pk = record.primary_key
-            if pk in existing_map:
+            if pk in existing_map or pk in inserted:
                 # Ignorar registros existentes (no actualizar ni borrar)
-                logger.debug("upsert_skipped_existing", pk=pk)
+                if debug:
+                    logger.debug("upsert_skipped_existing", pk=pk)
                 continue
 
             # Solo insertar nuevos registros
-            existing_map[pk] = record
-            result.inserted += 1
+            inserted[pk] = record
+            result.new_records.append(record)
 
+            if not debug:
+                continue
             # Loguear todos los campos del registro insertado en modo debug
             logger.debug(
                 "upsert_inserted_new_record",
@@ -511,116 +775,94 @@ class ConsolidateInvoicesUseCase:
                 currency=record.currency,
             )
 
-        result.all_records = list(existing_map.values())
+        result.inserted = len(result.new_records)
         return result
 
-    def _log_upsert_records(
+    def _upsert_record_logs(
         self,
         run_uuid: str,
         file_log_id: int,
         incoming: list[InvoiceRecord],
+        existing_map: dict[tuple, InvoiceRecord],
         result: UpsertResult,
-    ) -> None:
-        status_to_action = {
-            RecordStatus.NEW: "INSERT",
-            RecordStatus.UPDATED: "UPDATE",
-            RecordStatus.UNCHANGED: "UNCHANGED",
-        }
-        result_map = {r.primary_key: r for r in result.all_records}
-        batch: list[dict] = []
+    ) -> Iterator[dict]:
+        """Genera las filas de record_log del upsert de un archivo (perezosamente)."""
+        existing_get = existing_map.get
+        inserted_get = result.new_by_pk.get
+        action_get = STATUS_TO_ACTION.get
 
         for i, record in enumerate(incoming):
-            matched = result_map.get(record.primary_key)
-            action = status_to_action.get(matched.status if matched else RecordStatus.NEW, "INSERT")
-            batch.append(
-                {
-                    "run_uuid": run_uuid,
-                    "file_log_id": file_log_id,
-                    "row_index": i,
-                    "invoice_number": record.invoice_number,
-                    "reference_number": record.reference_number,
-                    "action": action,
-                    "error_message": None,
-                }
-            )
-
-        if batch:
-            self.tracker.log_records_batch(batch)
+            pk = record.primary_key
+            matched = existing_get(pk) or inserted_get(pk)
+            action = "INSERT" if matched is None else action_get(matched.status, "INSERT")
+            yield {
+                "run_uuid": run_uuid,
+                "file_log_id": file_log_id,
+                "row_index": i,
+                "invoice_number": record.invoice_number,
+                "reference_number": record.reference_number,
+                "action": action,
+                "error_message": None,
+            }
 
     def _reconcile(
         self,
-        report: ExecutionReport,
         source_records: list[InvoiceRecord],
+        existing_map: dict[tuple, InvoiceRecord],
         upsert_result: UpsertResult,
-    ) -> None:
-        source_pks = {r.primary_key for r in source_records}
-        result_pks = {r.primary_key for r in upsert_result.all_records}
-        missing = source_pks - result_pks
+    ) -> tuple[Decimal, Decimal]:
+        """Verifica que el resultado contenga cada PK y el mismo total; retorna
+        (total fuente, total resultado)."""
+        inserted_map = upsert_result.new_by_pk
+        # Una sola pasada: totales y PKs faltantes (el total resultado cuenta cada PK una vez)
+        source_total = result_total = _ZERO
+        seen: set[tuple] = set()
+        missing = 0
+        for record in source_records:
+            source_total += record.total_amount
+            pk = record.primary_key
+            if pk in seen:
+                continue
+            seen.add(pk)
+            matched = existing_map.get(pk) or inserted_map.get(pk)
+            if matched is None:
+                missing += 1
+            else:
+                result_total += matched.total_amount
 
         if missing:
             raise ReconciliationError(
-                data_loss_pct=(len(missing) / len(source_pks)) * 100,
-                amount_variance=Decimal("0"),
+                data_loss_pct=(missing / len(seen)) * 100,
+                amount_variance=_ZERO,
             )
 
-        source_total = sum((r.total_amount for r in source_records), Decimal("0"))
-        result_subset = [r for r in upsert_result.all_records if r.primary_key in source_pks]
-        result_total = sum((r.total_amount for r in result_subset), Decimal("0"))
-
         variance = abs(source_total - result_total)
-        if variance > Decimal("1"):
+        if variance > RECONCILE_TOLERANCE:
             raise ReconciliationError(data_loss_pct=0, amount_variance=variance)
 
-        report.source_total_amount += source_total
-        report.output_total_amount += result_total
+        return source_total, result_total
 
     def _dataframe_to_records(
         self, df: pd.DataFrame, transformer: RowTransformer
     ) -> list[InvoiceRecord]:
-        records = []
-        for _, row in df.iterrows():
-            try:
-                record = transformer.transform_row(row.to_dict(), source_name="consolidado")
-                records.append(record)
-            except Exception:
-                continue
+        """Parsea el consolidado columna a columna; las filas inválidas se omiten."""
+        records, _ = transformer.transform_dataframe(df, source_name="consolidado")
         return records
 
     def _records_to_dataframe(self, records: list[InvoiceRecord]) -> pd.DataFrame:
-        CONSOLIDATED_COLUMNS = [
-            "N° Factura",
-            "Empresa Transporte",
-            "Nave",
-            "Órdenes de Embarque",
-            "Guías de Despacho",
-            "Total Servicio ($)",
-            "Fecha Emisión",
-            "Fecha Recepción Digital",
-            "Aprobado por:",
-            "Estado Operaciones",
-            "Fecha Aprobación Operaciones",
-            "Observaciones",
-        ]
-
-        rows = []
-        for r in records:
-            rows.append(
-                {
-                    "N° Factura": r.invoice_number,
-                    "Empresa Transporte": r.carrier_name,
-                    "Nave": r.ship_name,
-                    "Órdenes de Embarque": r.reference_number,
-                    "Guías de Despacho": r.dispatch_guides,
-                    "Total Servicio ($)": float(r.total_amount),
-                    "Fecha Emisión": r.invoice_date,
-                    "Fecha Recepción Digital": r.fecha_recepcion_digital,
-                    "Aprobado por:": r.aprobado_por,
-                    "Estado Operaciones": r.estado_operaciones,
-                    "Fecha Aprobación Operaciones": r.fecha_aprobacion_operaciones,
-                    "Observaciones": r.description,
-                }
+        # Construcción columnar: una lista por columna, sin dict intermedio por registro;
+        # el total va directo a un arreglo float64 (sin pasar por la lista de Decimal)
+        columns: dict[str, Any] = {
+            column: (
+                np.fromiter(
+                    (float(r.total_amount) for r in records), dtype=np.float64, count=len(records)
+                )
+                if column == _TOTAL_COLUMN
+                else [getter(r) for r in records]
             )
-        return pd.DataFrame(rows, columns=CONSOLIDATED_COLUMNS)
+            for column, getter in _CONSOLIDATED_GETTERS.items()
+        }
+        return pd.DataFrame(columns, columns=list(CONSOLIDATED_COLUMNS), copy=False)
 
     def _finish(self, run_id: str, report: ExecutionReport) -> None:
         counters = {
@@ -641,12 +883,6 @@ class ConsolidateInvoicesUseCase:
         self._send_notification(report)
 
     def _send_notification(self, report: ExecutionReport) -> None:
-        STATUS_LABELS = {
-            "SUCCESS": "EXITOSO",
-            "PARTIAL": "ADVERTENCIA",
-            "ERROR": "ERROR",
-            "NO_FILES": "SIN ARCHIVOS",
-        }
         template_key = TEMPLATE_MAP.get(report.status, "error")
         template_name = self.config.email.templates.get(
             template_key, "ETL_Consolidacion_Error.html"
@@ -658,9 +894,9 @@ class ConsolidateInvoicesUseCase:
                 subject=subject,
                 template_name=template_name,
                 template_vars=report.to_template_vars(),
-                recipients=list(self.config.email.to),
-                cc=list(self.config.email.cc) or None,
-                bcc=list(self.config.email.bcc) or None,
+                recipients=self.config.email.to,
+                cc=self.config.email.cc or None,
+                bcc=self.config.email.bcc or None,
             )
         except Exception as e:
             logger.error("notification_failed", error=str(e))
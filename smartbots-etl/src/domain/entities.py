@@ -1,11 +1,14 @@
 """Entidades de dominio del proceso de consolidación de facturas."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
 from typing import Optional
 
+# Diferencia máxima aceptada entre total y neto + IVA (1 peso)
+_AMOUNT_TOLERANCE = Decimal("1")
+
 
 class RecordStatus(Enum):
     """Estado de un registro durante el procesamiento."""
@@ -16,7 +19,7 @@ class RecordStatus(Enum):
     ERROR = "error"  # Falló validación
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, slots=True, kw_only=True)
 class InvoiceRecord:
     """
     Entidad central: una fila de factura de transporte.
@@ -51,11 +54,17 @@ class InvoiceRecord:
     processed_at: Optional[datetime] = None
     status: RecordStatus = RecordStatus.NEW
 
+    # Clave primaria precalculada (ver primary_key)
+    _pk: tuple[str, str] = field(init=False, repr=False, compare=False)
+
     def __post_init__(self) -> None:
         """Validaciones de invariantes de dominio."""
-        if not self.invoice_number or not self.invoice_number.strip():
+        # Las partes de la clave se normalizan una vez y se reutilizan en _pk
+        invoice_number = self.invoice_number and self.invoice_number.strip()
+        if not invoice_number:
             raise ValueError("invoice_number no puede estar vacío")
-        if not self.reference_number or not self.reference_number.strip():
+        reference_number = self.reference_number and self.reference_number.strip()
+        if not reference_number:
             raise ValueError("reference_number no puede estar vacío")
         if not self.carrier_name or not self.carrier_name.strip():
             raise ValueError("carrier_name no puede estar vacío")
@@ -64,39 +73,21 @@ class InvoiceRecord:
             raise ValueError(f"total_amount no puede ser negativo: {self.total_amount}")
         # Validación cruzada: total ≈ net + tax
         expected = self.net_amount + self.tax_amount
-        if abs(self.total_amount - expected) > Decimal("1"):
+        if abs(self.total_amount - expected) > _AMOUNT_TOLERANCE:
             raise ValueError(
                 f"total_amount ({self.total_amount}) no coincide con "
                 f"net ({self.net_amount}) + tax ({self.tax_amount}) = {expected}"
             )
+        object.__setattr__(self, "_pk", (invoice_number, reference_number))
 
     @property
     def primary_key(self) -> tuple[str, str]:
         """Clave compuesta para matching en upsert."""
-        return (self.invoice_number.strip(), self.reference_number.strip())
+        return self._pk
 
     def with_status(self, new_status: RecordStatus) -> "InvoiceRecord":
         """Retorna copia con status actualizado."""
-        return InvoiceRecord(
-            invoice_number=self.invoice_number,
-            reference_number=self.reference_number,
-            carrier_name=self.carrier_name,
-            ship_name=self.ship_name,
-            dispatch_guides=self.dispatch_guides,
-            invoice_date=self.invoice_date,
-            description=self.description,
-            net_amount=self.net_amount,
-            tax_amount=self.tax_amount,
-            total_amount=self.total_amount,
-            currency=self.currency,
-            fecha_recepcion_digital=self.fecha_recepcion_digital,
-            aprobado_por=self.aprobado_por,
-            estado_operaciones=self.estado_operaciones,
-            fecha_aprobacion_operaciones=self.fecha_aprobacion_operaciones,
-            source_file=self.source_file,
-            processed_at=self.processed_at,
-            status=new_status,
-        )
+        return replace(self, status=new_status)
 
     def has_changes_vs(self, other: "InvoiceRecord") -> bool:
         """Compara campos de negocio (ignora metadatos)."""
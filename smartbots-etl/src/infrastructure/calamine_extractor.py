@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+from decimal import Decimal
+import functools
 from pathlib import Path
 from typing import Any
 
@@ -10,10 +13,42 @@ import structlog
 
 from src.application.config import ExcelConfig
 from src.domain.entities import InvoiceRecord
-from src.domain.value_objects import Money
 
 logger = structlog.get_logger()
 
+# Filas de encabezado del formato antes de los datos
+HEADER_ROWS = 10
+
+_ZERO = Decimal("0")
+_DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d")
+# Ordinal base de los números de serie de Excel (sistema 1900)
+_EXCEL_EPOCH_ORDINAL = datetime(1900, 1, 1).toordinal() - 2
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date(value: str | None) -> str:
+    """Parsea fecha desde formato Excel o dd-mm-yyyy (las fechas se repiten entre filas)."""
+    if not value:
+        return ""
+
+    # Intentar varios formatos
+    for fmt in _DATE_FORMATS:
+        try:
+            dt = datetime.strptime(value, fmt)
+            return dt.strftime("%Y-%m-%d")
+        except (ValueError, TypeError):
+            continue
+
+    # Si es número de serie de Excel
+    try:
+        excel_date = float(value)
+        dt = datetime.fromordinal(_EXCEL_EPOCH_ORDINAL + int(excel_date))
+        return dt.strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        pass
+
+    return value
+
 
 class CalamineExtractor:
     """Extractor usando calamine para lectura rápida de XLSX."""
@@ -21,6 +56,8 @@ class CalamineExtractor:
     def __init__(self, config: ExcelConfig) -> None:
         self._config = config
         self._source_sheet = config.source_sheet
+        # Valores repetidos (transportistas) comparten un solo str entre filas y archivos
+        self._string_pool: dict[str, str] = {}
 
     def extract(self, file_path: Path) -> list[InvoiceRecord]:
         """Extrae registros usando calamine."""
@@ -35,47 +72,49 @@ class CalamineExtractor:
                     f"Disponibles: {excel_reader.sheet_names}"
                 )
 
-            df = excel_reader.read_sheet(self._source_sheet, dtype="string")
+            # Saltar filas de encabezados al leer; cada columna se materializa una sola vez.
+            # Se omiten la fila 1 y las HEADER_ROWS siguientes: el primer dato es la fila 12
+            # y su idx es HEADER_ROWS, igual que cuando la fila 1 se leía como header
+            sheet = excel_reader.load_sheet(
+                self._source_sheet, header_row=None, skip_rows=HEADER_ROWS + 1, dtypes="string"
+            )
+            columns = [column.to_pylist() for column in sheet.to_arrow().columns]
+            n_rows = sheet.height
+
+            def cells(col_idx: int) -> list[str | None]:
+                """Valores limpios de una columna (soporta índices negativos)."""
+                try:
+                    return [self._clean_cell(v) for v in columns[col_idx]]
+                except IndexError:
+                    return [None] * n_rows
 
+            source_name = file_path.name
             records = []
-            for idx in range(len(df)):
+            # Columnas: B = empresa, G = referencia, H = fecha, última = total
+            carriers = [self._intern(v) if v else v for v in cells(1)]
+            rows = zip(carriers, cells(7), cells(6), cells(-1))
+            for idx, (empresa, fecha, referencia, total) in enumerate(rows, start=HEADER_ROWS):
+                if not empresa or not fecha:
+                    continue
                 try:
-                    # Obtener valores de celdas específicas
-                    # Formato: B6, B7, B8, H6 (celdas fijas)
-                    row_data = df.row(idx)
-
-                    # Extraer usando índices de columnas
-                    # Columna B = índice 1, H = índice 7
-
-                    # Buscar fila con datos (no headers)
-                    if idx < 10:  # Saltar filas de encabezados
-                        continue
-
-                    # Extraer valores
-                    empresa = self._get_cell_value(row_data, 1)  # Columna B
-                    fecha = self._get_cell_value(row_data, 7)  # Columna H
-
-                    if not empresa or not fecha:
-                        continue
-
-                    # Crear InvoiceRecord
+                    amount = Decimal(total) if total else _ZERO
                     record = InvoiceRecord(
                         invoice_number=str(idx),
-                        reference_number=self._get_cell_value(row_data, 6) or "",
-                        carrier_name=str(empresa),
+                        reference_number=referencia or "",
+                        carrier_name=empresa,
                         ship_name="",
                         dispatch_guides="",
-                        invoice_date=self._parse_date(fecha),
+                        invoice_date=_parse_date(fecha),
                         description="",
-                        net_amount=Money(amount="0"),
-                        tax_amount=Money(amount="0"),
-                        total_amount=Money(amount=self._get_cell_value(row_data, -1) or "0"),
+                        net_amount=amount,
+                        tax_amount=_ZERO,
+                        total_amount=amount,
                         currency="CLP",
                         fecha_recepcion_digital="",
                         aprobado_por="",
                         estado_operaciones="",
                         fecha_aprobacion_operaciones="",
-                        source_file=file_path.name,
+                        source_file=source_name,
                     )
                     records.append(record)
 
@@ -93,38 +132,10 @@ class CalamineExtractor:
             logger.error("extraction_failed", file=file_path.name, error=str(e))
             raise
 
-    def _get_cell_value(self, row: list[Any], col_idx: int) -> str | None:
-        """Obtiene valor de celda, soporta índices negativos."""
-        try:
-            if col_idx < 0:
-                col_idx = len(row) + col_idx
-            val = row[col_idx]
-            return str(val).strip() if val and str(val).strip() != "None" else None
-        except IndexError:
-            return None
-
-    def _parse_date(self, value: str | None) -> str:
-        """Parsea fecha desde formato Excel o dd-mm-yyyy."""
-        if not value:
-            return ""
-
-        from datetime import datetime
-
-        # Intentar varios formatos
-        formats = ["%d-%m-%Y", "%Y-%m-%d"]
-        for fmt in formats:
-            try:
-                dt = datetime.strptime(value, fmt)
-                return dt.strftime("%Y-%m-%d")
-            except (ValueError, TypeError):
-                continue
-
-        # Si es número de serie de Excel
-        try:
-            excel_date = float(value)
-            dt = datetime.fromordinal(datetime(1900, 1, 1).toordinal() + int(excel_date) - 2)
-            return dt.strftime("%Y-%m-%d")
-        except (ValueError, TypeError):
-            pass
+    def _intern(self, value: str) -> str:
+        return self._string_pool.setdefault(value, value)
 
-        return value
+    @staticmethod
+    def _clean_cell(val: Any) -> str | None:
+        """Valor de celda como string sin espacios; None si está vacía."""
+        return str(val).strip() if val and str(val).strip() != "None" else None
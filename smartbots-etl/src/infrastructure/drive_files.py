@@ -0,0 +1,34 @@
+"""Helpers de Drive v3 compartidos por los adaptadores (service account y OAuth)."""
+
+from pathlib import Path
+from typing import Any
+
+from googleapiclient.http import MediaFileUpload
+
+from src.infrastructure.google_services import execute_with_retry
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Máximo permitido por files().list
+LIST_PAGE_SIZE = 1000
+# Sobre este tamaño se sube en modo resumable (bajo él, un solo request multipart)
+RESUMABLE_UPLOAD_MIN_BYTES = 5 * 1024 * 1024
+
+
+def xlsx_media(local_path: Path) -> MediaFileUpload:
+    """Media de subida para un .xlsx local, resumable solo si es grande."""
+    resumable = local_path.stat().st_size > RESUMABLE_UPLOAD_MIN_BYTES
+    return MediaFileUpload(str(local_path), mimetype=XLSX_MIME, resumable=resumable)
+
+
+def list_all_files(service: Any, params: dict[str, Any]) -> list[dict]:
+    """Ejecuta files().list recorriendo todas las páginas de resultados."""
+    # Sin paginar, Drive entrega solo la primera página (100 por defecto)
+    params = dict(params)
+    files: list[dict] = []
+    while True:
+        results = execute_with_retry(service.files().list(**params))
+        files.extend(results.get("files", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return files
+        params["pageToken"] = page_token
@@ -2,14 +2,34 @@
 
 from __future__ import annotations
 
+from pathlib import Path
 from typing import Any
 
 import structlog
 
+from src.infrastructure import json_fast
+from src.infrastructure.google_services import execute_with_retry
+
 logger = structlog.get_logger()
 
 FOLDER_MIME = "application/vnd.google-apps.folder"
 
+_FOLDER_QUERY = (
+    "name='{name}' and '{parent}' in parents and mimeType='" + FOLDER_MIME + "' and trashed=false"
+)
+
+# Entradas conservadas en la caché persistente (las menos usadas recientemente se descartan)
+PATH_CACHE_MAX_ENTRIES = 256
+
+# Resultados de la consulta que resuelve varios segmentos a la vez; si no caben en
+# una página se resuelve segmento a segmento
+CHAIN_LOOKUP_PAGE_SIZE = 1000
+
+
+def escape_query_value(value: str) -> str:
+    """Escapa un valor para usarlo entre comillas simples en una consulta de Drive."""
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
 
 class DrivePathNotFoundError(Exception):
     """Un segmento de ruta no fue encontrado en Google Drive."""
@@ -23,10 +43,17 @@ class DrivePathNotFoundError(Exception):
 class DrivePathResolver:
     """Convierte rutas como 'Bot RPA/Tocornal/ETL Facturas' a folder IDs de Drive."""
 
-    def __init__(self, drive_service: Any, shared_drive_id: str | None = None) -> None:
+    def __init__(
+        self,
+        drive_service: Any,
+        shared_drive_id: str | None = None,
+        cache_path: str | Path | None = None,
+    ) -> None:
         self._service = drive_service
         self._shared_drive_id = shared_drive_id
-        self._cache: dict[str, str] = {}
+        # Ruta -> folder ID; con cache_path se reutiliza entre ejecuciones
+        self._cache_path = Path(cache_path) if cache_path else None
+        self._cache: dict[str, str] = self._load_cache()
 
     @classmethod
     def detect_shared_drive(cls, drive_service: Any, shared_drive_name: str) -> str | None:
@@ -34,10 +61,10 @@ class DrivePathResolver:
         if not shared_drive_name:
             return None
 
-        results = (
-            drive_service.drives()
-            .list(q=f"name='{shared_drive_name}'", fields="drives(id, name)")
-            .execute()
+        results = execute_with_retry(
+            drive_service.drives().list(
+                q=f"name='{escape_query_value(shared_drive_name)}'", fields="drives(id, name)"
+            )
         )
         drives = results.get("drives", [])
         if not drives:
@@ -54,64 +81,166 @@ class DrivePathResolver:
         Raises DrivePathNotFoundError si algún segmento no existe.
         """
         if path in self._cache:
-            return self._cache[path]
+            return self._touch(path)
+        return self._walk(path, create=False)
 
-        segments = [s.strip() for s in path.split("/") if s.strip()]
-        current_id = self._shared_drive_id or "root"
+    def ensure_path(self, path: str) -> str:
+        """Resuelve ruta, creando carpetas que no existan. Retorna folder ID final."""
+        return self._walk(path, create=True)
 
-        for i, segment in enumerate(segments):
-            partial = "/".join(segments[: i + 1])
-            if partial in self._cache:
-                current_id = self._cache[partial]
-                continue
+    def invalidate(self, path: str) -> bool:
+        """Olvida la ruta, sus ancestros y descendientes (p. ej. tras mover carpetas).
 
-            current_id = self._find_folder(segment, current_id)
-            self._cache[partial] = current_id
+        Retorna True si había entradas en caché para esa ruta.
+        """
+        path = "/".join(s.strip() for s in path.split("/") if s.strip())
+        stale = [
+            key
+            for key in self._cache
+            if key == path or key.startswith(f"{path}/") or path.startswith(f"{key}/")
+        ]
+        for key in stale:
+            del self._cache[key]
+        if stale:
+            logger.info("drive_path_cache_invalidated", path=path, entries=len(stale))
+            self._save_cache()
+        return bool(stale)
+
+    def _walk(self, path: str, create: bool) -> str:
+        """Recorre la ruta desde su prefijo en caché, buscando (o creando) cada segmento.
+
+        Los segmentos pendientes se buscan con una sola consulta (_lookup_chain); si no
+        aplica o no cabe en una página, se buscan uno a uno.
+        """
+        segments = [s.strip() for s in path.split("/") if s.strip()]
+        cached = len(self._cache)
+        start, current_id = self._cached_prefix(segments)
+        found: dict[int, str] | None = None
+        chain_tried = False
+
+        for i in range(start, len(segments)):
+            segment = segments[i]
+            # "root" es un alias: los parents de la API traen el ID real de Mi unidad
+            if not chain_tried and current_id != "root" and len(segments) - i > 1:
+                chain_tried = True
+                found = self._lookup_chain(segments, i, current_id)
+
+            folder_id: str | None = None
+            if found is not None:
+                folder_id = found.get(i)
+            else:
+                try:
+                    folder_id = self._find_folder(segment, current_id)
+                except DrivePathNotFoundError:
+                    if not create:
+                        raise
+            if folder_id is None:
+                if not create:
+                    raise DrivePathNotFoundError(segment, current_id)
+                folder_id = self._create_folder(segment, current_id)
+
+            current_id = folder_id
+            self._cache["/".join(segments[: i + 1])] = current_id
 
         self._cache[path] = current_id
+        if len(self._cache) != cached:
+            self._save_cache()
         return current_id
 
-    def ensure_path(self, path: str) -> str:
-        """Resuelve ruta, creando carpetas que no existan. Retorna folder ID final."""
-        segments = [s.strip() for s in path.split("/") if s.strip()]
-        current_id = self._shared_drive_id or "root"
-
-        for i, segment in enumerate(segments):
-            partial = "/".join(segments[: i + 1])
+    def _cached_prefix(self, segments: list[str]) -> tuple[int, str]:
+        """Prefijo más largo de la ruta que está en caché: (segmentos resueltos, folder ID)."""
+        for end in range(len(segments), 0, -1):
+            partial = "/".join(segments[:end])
             if partial in self._cache:
-                current_id = self._cache[partial]
-                continue
+                return end, self._touch(partial)
+        return 0, self._shared_drive_id or "root"
+
+    def _lookup_chain(
+        self, segments: list[str], start: int, parent_id: str
+    ) -> dict[int, str] | None:
+        """Busca segments[start:] bajo parent_id con un solo files.list.
 
-            try:
-                current_id = self._find_folder(segment, current_id)
-            except DrivePathNotFoundError:
-                current_id = self._create_folder(segment, current_id)
+        Retorna {índice: folder ID} hasta el primer segmento inexistente (los siguientes
+        no existen). Retorna None si los resultados no caben en una página.
+        """
+        names = " or ".join(
+            f"name='{escape_query_value(name)}'" for name in dict.fromkeys(segments[start:])
+        )
+        params: dict[str, Any] = {
+            "q": f"({names}) and mimeType='{FOLDER_MIME}' and trashed=false",
+            "fields": "nextPageToken, files(id, name, parents)",
+            "pageSize": CHAIN_LOOKUP_PAGE_SIZE,
+        }
+        self._scope_to_drive(params)
+        results = execute_with_retry(self._service.files().list(**params))
+        if results.get("nextPageToken"):
+            logger.debug("drive_path_chain_lookup_truncated", segments=len(segments) - start)
+            return None
 
-            self._cache[partial] = current_id
+        children: dict[tuple[str, str], list[str]] = {}
+        for folder in results.get("files", []):
+            for parent in folder.get("parents", []):
+                children.setdefault((folder["name"], parent), []).append(folder["id"])
+
+        found: dict[int, str] = {}
+        current_id = parent_id
+        for i in range(start, len(segments)):
+            matches = children.get((segments[i], current_id))
+            if not matches:
+                break
+            if len(matches) > 1:
+                logger.warning(
+                    "drive_duplicate_folders",
+                    name=segments[i],
+                    parent_id=current_id,
+                    count=len(matches),
+                )
+            current_id = found[i] = matches[0]
+        return found
+
+    def _touch(self, key: str) -> str:
+        """Retorna una entrada en caché y la marca como la más recientemente usada."""
+        folder_id = self._cache[key] = self._cache.pop(key)
+        return folder_id
 
-        self._cache[path] = current_id
-        return current_id
+    def _load_cache(self) -> dict[str, str]:
+        """Lee la caché persistente; se ignora si es de otra unidad o está corrupta."""
+        if self._cache_path is None or not self._cache_path.exists():
+            return {}
+        try:
+            data = json_fast.loads(self._cache_path.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning("drive_path_cache_unreadable", path=str(self._cache_path), error=str(e))
+            return {}
+        if data.get("drive") != (self._shared_drive_id or "root"):
+            return {}
+        return dict(data.get("paths", {}))
+
+    def _save_cache(self) -> None:
+        """Persiste las entradas más recientes de la caché (no falla la ejecución)."""
+        if self._cache_path is None:
+            return
+        paths = dict(list(self._cache.items())[-PATH_CACHE_MAX_ENTRIES:])
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            json_fast.dump_atomic(
+                {"drive": self._shared_drive_id or "root", "paths": paths}, self._cache_path
+            )
+        except OSError as e:
+            logger.warning(
+                "drive_path_cache_write_failed", path=str(self._cache_path), error=str(e)
+            )
 
     def _find_folder(self, name: str, parent_id: str) -> str:
         """Busca una carpeta por nombre dentro de un padre. Raises DrivePathNotFoundError."""
-        query = (
-            f"name='{name}' "
-            f"and '{parent_id}' in parents "
-            f"and mimeType='{FOLDER_MIME}' "
-            f"and trashed=false"
-        )
         params: dict[str, Any] = {
-            "q": query,
+            "q": _FOLDER_QUERY.format(name=escape_query_value(name), parent=parent_id),
             "fields": "files(id, name)",
             "pageSize": 10,
         }
-        if self._shared_drive_id:
-            params["driveId"] = self._shared_drive_id
-            params["corpora"] = "drive"
-            params["includeItemsFromAllDrives"] = True
-            params["supportsAllDrives"] = True
+        self._scope_to_drive(params)
 
-        results = self._service.files().list(**params).execute()
+        results = execute_with_retry(self._service.files().list(**params))
         files = results.get("files", [])
 
         if not files:
@@ -128,6 +257,14 @@ class DrivePathResolver:
         folder_id: str = files[0]["id"]
         return folder_id
 
+    def _scope_to_drive(self, params: dict[str, Any]) -> None:
+        """Restringe una consulta files.list al Shared Drive configurado (si hay)."""
+        if self._shared_drive_id:
+            params["driveId"] = self._shared_drive_id
+            params["corpora"] = "drive"
+            params["includeItemsFromAllDrives"] = True
+            params["supportsAllDrives"] = True
+
     def _create_folder(self, name: str, parent_id: str) -> str:
         """Crea una carpeta en Drive. Retorna el nuevo folder ID."""
         metadata: dict[str, Any] = {
@@ -139,7 +276,7 @@ class DrivePathResolver:
         if self._shared_drive_id:
             params["supportsAllDrives"] = True
 
-        folder = self._service.files().create(**params).execute()
+        folder = execute_with_retry(self._service.files().create(**params), idempotent=False)
         folder_id: str = folder["id"]
         logger.info("drive_folder_created", name=name, folder_id=folder_id)
         return folder_id
@@ -1,5 +1,7 @@
+from collections.abc import Callable
 from copy import copy
 from pathlib import Path
+from typing import Any
 import tempfile
 import zipfile
 
@@ -7,13 +9,20 @@ import openpyxl
 import pandas as pd
 import structlog
 from openpyxl.drawing.image import Image
-from openpyxl.styles import Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.styles.cell_style import StyleArray
 from openpyxl.worksheet.worksheet import Worksheet
 
 logger = structlog.get_logger()
 
 _FALLBACK_SHEET = "Sheet1"
 
+# Estilo del encabezado de un consolidado nuevo (el de df.to_excel en pandas<3)
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(*(Side(style="thin"),) * 4)
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
 COLUMN_FORMATS = {
     "N° Factura": {"number_format": "0", "alignment": Alignment(horizontal="center")},
     "Empresa Transporte": {"alignment": Alignment(horizontal="center")},
@@ -38,15 +47,20 @@ COLUMN_FORMATS = {
 
 class OpenpyxlExcelHandler:
     def read(
-        self, file_path: Path, sheet_name: str = "Sheet1", header_row: int | None = None
+        self,
+        file_path: Path,
+        sheet_name: str = "Sheet1",
+        header_row: int | None = None,
+        usecols: Callable[[str], bool] | None = None,
     ) -> pd.DataFrame:
-        actual_sheet = self._resolve_sheet(file_path, sheet_name)
-
         # pandas header is 0-indexed. header_row is 1-indexed (Excel).
         # header_row=None -> header=0 (default)
         header_arg = 0 if header_row is None else header_row - 1
 
-        df = pd.read_excel(file_path, sheet_name=actual_sheet, header=header_arg, engine="openpyxl")
+        # Un solo parseo del workbook para resolver la hoja y leerla
+        with pd.ExcelFile(file_path, engine="openpyxl") as xls:
+            actual_sheet = self._resolve_sheet(file_path, xls.sheet_names, sheet_name)
+            df = xls.parse(sheet_name=actual_sheet, header=header_arg, usecols=usecols)
         logger.info(
             "excel_read",
             path=str(file_path),
@@ -67,7 +81,7 @@ class OpenpyxlExcelHandler:
         data_start_row: int = 1,
     ) -> None:
         if not file_path.exists():
-            df.to_excel(file_path, sheet_name=sheet_name, index=False, engine="openpyxl")
+            self._create(df, file_path, sheet_name)
             logger.info("excel_created", path=str(file_path), rows=len(df))
             return
 
@@ -88,14 +102,26 @@ class OpenpyxlExcelHandler:
                 template_row = next_row - 1 if next_row > data_start_row else None
 
             column_names = list(df.columns)
+            has_template = bool(template_row and template_row >= data_start_row)
+            # Estilo de cada columna resuelto una vez (no por celda)
+            column_styles = [
+                self._column_style(ws, template_row if has_template else None, col_idx, col_name)
+                for col_idx, col_name in enumerate(column_names, start=1)
+            ]
+            invoice_col = (
+                column_names.index("N° Factura") + 1 if "N° Factura" in column_names else None
+            )
+
+            # Estilo final por (columna, estilo previo de la celda): se resuelve con los
+            # setters de openpyxl una vez y las demás celdas copian el StyleArray
+            # (cell._style es interno: openpyxl queda fijado a 3.1.x en pyproject.toml)
+            resolved_styles: dict[tuple[int, tuple[int, ...] | None], StyleArray] = {}
 
             for row_idx, row in enumerate(df.itertuples(index=False), start=next_row):
                 for col_idx, value in enumerate(row, start=1):
                     cell = ws.cell(row=row_idx, column=col_idx)
 
-                    col_name = column_names[col_idx - 1] if col_idx <= len(column_names) else ""
-
-                    if col_name == "N° Factura" and value is not None:
+                    if col_idx == invoice_col and value is not None:
                         try:
                             cell.value = int(float(str(value)))
                         except (ValueError, TypeError):
@@ -103,20 +129,23 @@ class OpenpyxlExcelHandler:
                     else:
                         cell.value = value
 
-                    if template_row and template_row >= data_start_row:
-                        template_cell = ws.cell(row=template_row, column=col_idx)
-                        if template_cell.has_style:
-                            cell.font = copy(template_cell.font)
-                            cell.border = copy(template_cell.border)
-                            cell.fill = copy(template_cell.fill)
-                            cell.protection = copy(template_cell.protection)
-
-                    if col_name and col_name in COLUMN_FORMATS:
-                        fmt = COLUMN_FORMATS[col_name]
-                        if "number_format" in fmt:
-                            cell.number_format = fmt["number_format"]
-                        if "alignment" in fmt:
-                            cell.alignment = fmt["alignment"]
+                    if col_idx > len(column_styles):
+                        continue
+                    # _style es None en celdas nuevas (estilo por defecto)
+                    previous = cell._style
+                    style_key = (col_idx, tuple(previous) if previous is not None else None)
+                    resolved = resolved_styles.get(style_key)
+                    if resolved is not None:
+                        cell._style = copy(resolved)
+                        continue
+                    template_style, number_format, alignment = column_styles[col_idx - 1]
+                    if template_style is not None:
+                        cell.font, cell.border, cell.fill, cell.protection = template_style
+                    if number_format is not None:
+                        cell.number_format = number_format
+                    if alignment is not None:
+                        cell.alignment = alignment
+                    resolved_styles[style_key] = copy(cell._style)
 
             wb.save(file_path)
             logger.info(
@@ -131,39 +160,89 @@ class OpenpyxlExcelHandler:
 
         self._reinsert_images(file_path, sheet_name, images)
 
+    @staticmethod
+    def _create(df: pd.DataFrame, file_path: Path, sheet_name: str) -> None:
+        """Crea el archivo en modo write-only: las filas van directo al XML, sin mantener
+        un objeto Cell por valor.
+
+        Mismos valores que df.to_excel(index=False) (NaN -> celda vacía). El encabezado
+        lleva negrita, borde fino y alineación centrada como en pandas<3: pandas>=3 ya no
+        lo aplica, pero el consolidado mantiene su formato.
+        """
+        columns = []
+        for name in df.columns:
+            series = df[name]
+            values = series.tolist()
+            if series.hasnans:
+                missing = series.isna().tolist()
+                values = [None if na else value for value, na in zip(values, missing)]
+            columns.append(values)
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_name)
+        ws.append([OpenpyxlExcelHandler._header_cell(ws, name) for name in df.columns])
+        for row in zip(*columns):
+            ws.append(row)
+        wb.save(file_path)
+
+    @staticmethod
+    def _header_cell(ws: Any, value: Any) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = _HEADER_FONT
+        cell.border = _HEADER_BORDER
+        cell.alignment = _HEADER_ALIGNMENT
+        return cell
+
+    @staticmethod
+    def _column_style(
+        ws: Worksheet, template_row: int | None, col_idx: int, col_name: str
+    ) -> tuple[tuple | None, str | None, Alignment | None]:
+        """Estilo a aplicar en una columna: (font, border, fill, protection) de la fila
+        plantilla si tiene estilo, y number_format/alignment de COLUMN_FORMATS."""
+        template_style = None
+        if template_row is not None:
+            template_cell = ws.cell(row=template_row, column=col_idx)
+            if template_cell.has_style:
+                template_style = (
+                    copy(template_cell.font),
+                    copy(template_cell.border),
+                    copy(template_cell.fill),
+                    copy(template_cell.protection),
+                )
+        fmt = COLUMN_FORMATS.get(col_name, {})
+        return template_style, fmt.get("number_format"), fmt.get("alignment")
+
     @staticmethod
     def _find_next_empty_row(ws: Worksheet, min_row: int) -> int:
         """Encuentra la siguiente fila vacía, respetando min_row."""
         if ws.max_row < min_row:
             return min_row
 
-        # Buscar hacia arriba desde max_row hasta min_row
-        for r in range(ws.max_row, min_row - 1, -1):
-            if any(cell.value is not None for cell in ws[r]):
-                return r + 1
-
-        return min_row
+        # Última fila con algún valor, en una pasada sobre las celdas existentes.
+        # Recorrer ws[r] hacia arriba recalcula max_column sobre todas las celdas y crea
+        # las que faltan en cada fila visitada (cuadrático con filas vacías con formato).
+        # ws._cells es interno: openpyxl queda fijado a 3.1.x en pyproject.toml.
+        last_filled = max(
+            (r for (r, _col), cell in ws._cells.items() if r >= min_row and cell.value is not None),
+            default=None,
+        )
+        return min_row if last_filled is None else last_filled + 1
 
     @staticmethod
-    def _resolve_sheet(file_path: Path, requested: str) -> str:
-        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-        try:
-            sheets = wb.sheetnames
-            if requested in sheets:
-                return requested
-            if _FALLBACK_SHEET in sheets:
-                logger.warning(
-                    "sheet_fallback",
-                    path=str(file_path),
-                    requested=requested,
-                    fallback=_FALLBACK_SHEET,
-                )
-                return _FALLBACK_SHEET
-            raise ValueError(
-                f"Sheet '{requested}' no encontrado en {file_path}. Sheets disponibles: {sheets}"
+    def _resolve_sheet(file_path: Path, sheets: list[str], requested: str) -> str:
+        if requested in sheets:
+            return requested
+        if _FALLBACK_SHEET in sheets:
+            logger.warning(
+                "sheet_fallback",
+                path=str(file_path),
+                requested=requested,
+                fallback=_FALLBACK_SHEET,
             )
-        finally:
-            wb.close()
+            return _FALLBACK_SHEET
+        raise ValueError(
+            f"Sheet '{requested}' no encontrado en {file_path}. Sheets disponibles: {sheets}"
+        )
 
     def validate_schema(
         self, df: pd.DataFrame, expected_columns: list[str]
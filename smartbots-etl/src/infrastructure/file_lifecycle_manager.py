@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import time
 from datetime import datetime
 from typing import Any
 
@@ -9,9 +10,18 @@ import structlog
 
 from src.application.config import DrivePathsConfig
 from src.infrastructure.drive_path_resolver import DrivePathResolver
+from src.infrastructure.google_services import (
+    MAX_ATTEMPTS,
+    execute_with_retry,
+    is_retryable_error,
+    retry_delay,
+)
 
 logger = structlog.get_logger()
 
+# Máximo de sub-requests que acepta un request batch de Drive
+DRIVE_BATCH_MAX_REQUESTS = 100
+
 
 class FileLifecycleManager:
     """Mueve archivos a través de sus etapas de ciclo de vida en Google Drive."""
@@ -35,14 +45,15 @@ class FileLifecycleManager:
     def init_backup_folder(self) -> str:
         """
         Inicializa el folder de backup con la fecha/hora actual.
-        Debe llamarse al inicio de la ejecución.
+        Se llama al inicio de la ejecución; si no, la primera operación de backup lo
+        inicializa, y la fecha/hora queda fija para el resto de la ejecución.
         Retorna el ID del folder de backup.
         """
         now = datetime.now()
         self._backup_date_str = now.strftime("%Y-%m-%d")
         self._backup_time_str = now.strftime("%H.%M.%S")
 
-        backup_full = f"{self._config.source_path}/{self._config.backup_path}/{self._backup_date_str}/{self._backup_time_str}"
+        backup_full = self._backup_folder_path()
         self._backup_folder_id = self._path_resolver.ensure_path(backup_full)
 
         logger.debug(
@@ -55,17 +66,14 @@ class FileLifecycleManager:
 
     def move_to_in_process(self, file_id: str, source_folder_id: str) -> str:
         """
-        Mueve archivo de source → source/En Proceso/.
-        También crea una copia en Respaldo/fecha/hora/.
+        Mueve archivo de source → source/En Proceso/ con un solo files.update.
+        No se copia a Respaldo: el mismo archivo llega allí al final con
+        move_many_to_backup(), o vuelve a source si el consolidado falla.
         Retorna file_id.
         """
         in_process_path = f"{self._config.source_path}/{self._config.in_process_folder}"
         in_process_id = self._path_resolver.ensure_path(in_process_path)
 
-        # Primero crear backup antes de mover
-        self._copy_to_backup(file_id)
-
-        # Luego mover a En Proceso
         self._move_file(file_id, source_folder_id, in_process_id)
         self._in_process_folder_id = in_process_id
 
@@ -76,51 +84,95 @@ class FileLifecycleManager:
         )
         return file_id
 
-    def _copy_to_backup(self, file_id: str) -> None:
+    def move_many_to_backup(
+        self, file_ids: list[str], in_process_folder_id: str | None = None
+    ) -> dict[str, Exception]:
         """
-        Crea una copia del archivo en la carpeta de backup.
+        Mueve varios archivos de En Proceso → Respaldo agrupando los updates en
+        requests batch de Drive (un round-trip cada DRIVE_BATCH_MAX_REQUESTS archivos).
+        Retorna {file_id: error} de los archivos que no se pudieron mover.
         """
-        if self._backup_folder_id is None:
-            self.init_backup_folder()
-
-        # Obtener el nombre del archivo
-        file_metadata = self._service.files().get(fileId=file_id, fields="name").execute()
-        file_name = file_metadata.get("name", "unknown")
-
-        # Copiar el archivo al folder de backup
-        body = {"name": file_name, "parents": [self._backup_folder_id]}
-        params = {"fileId": file_id, "body": body}
-        if self._shared_drive_id:
-            params["supportsAllDrives"] = True
-
-        self._service.files().copy(**params).execute()
-
-        logger.info(
-            "file_copied_to_backup",
-            file_id=file_id,
-            file_name=file_name,
-            backup_folder_id=self._backup_folder_id,
-        )
+        from_folder = self._backup_source_folder(in_process_folder_id)
+        backup_folder_id = self._get_backup_folder()
+        return self._move_many(file_ids, from_folder, backup_folder_id, "file_moved_to_backup")
 
-    def move_to_backup(self, file_id: str, in_process_folder_id: str | None = None) -> str:
-        """Mueve archivo de En Proceso → Respaldo/yyyy-mm-dd/hh.mi.ss/. Retorna file_id."""
+    def move_many_to_source(
+        self,
+        file_ids: list[str],
+        source_folder_id: str,
+        in_process_folder_id: str | None = None,
+    ) -> dict[str, Exception]:
+        """
+        Devuelve archivos de En Proceso → source (p. ej. si el consolidado no se pudo
+        escribir), para que la siguiente ejecución los reprocese.
+        Retorna {file_id: error} de los archivos que no se pudieron mover.
+        """
+        from_folder = in_process_folder_id or self._in_process_folder_id
+        if not from_folder:
+            msg = "No se puede devolver a source: folder de origen desconocido"
+            raise ValueError(msg)
+        return self._move_many(file_ids, from_folder, source_folder_id, "file_returned_to_source")
+
+    def _move_many(
+        self, file_ids: list[str], from_folder: str, to_folder: str, event: str
+    ) -> dict[str, Exception]:
+        """Mueve archivos en requests batch; los sub-requests rechazados por rate limit
+        o 5xx se reenvían en un nuevo batch con backoff."""
+        failures: dict[str, Exception] = {}
+
+        def on_response(file_id: str, _response: Any, exception: Exception | None) -> None:
+            if exception is not None:
+                failures[file_id] = exception
+                return
+            logger.info(event, file_id=file_id, folder_id=to_folder)
+
+        pending = list(file_ids)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            for start in range(0, len(pending), DRIVE_BATCH_MAX_REQUESTS):
+                batch = self._service.new_batch_http_request(callback=on_response)
+                for file_id in pending[start : start + DRIVE_BATCH_MAX_REQUESTS]:
+                    batch.add(
+                        self._move_request(file_id, from_folder, to_folder),
+                        request_id=file_id,
+                    )
+                execute_with_retry(batch)
+
+            # El update de parents es idempotente: se reintenta también ante 5xx
+            retryable = [
+                fid for fid in pending if fid in failures and is_retryable_error(failures[fid])
+            ]
+            if not retryable or attempt == MAX_ATTEMPTS:
+                break
+            wait = max(retry_delay(failures[fid], attempt) for fid in retryable)
+            logger.warning(
+                "move_batch_retry", files=len(retryable), attempt=attempt, wait_s=round(wait, 2)
+            )
+            time.sleep(wait)
+            for file_id in retryable:
+                del failures[file_id]
+            pending = retryable
+        return failures
+
+    def _backup_source_folder(self, in_process_folder_id: str | None) -> str:
+        """Folder de origen para mover a backup."""
         from_folder = in_process_folder_id or self._in_process_folder_id
         if not from_folder:
             msg = "No se puede mover a backup: folder de origen desconocido"
             raise ValueError(msg)
+        return from_folder
 
-        # Usar el folder de backup ya inicializado (o inicializar si no existe)
-        if self._backup_folder_id is None:
-            self.init_backup_folder()
-
-        self._move_file(file_id, from_folder, self._backup_folder_id)
-
-        logger.info(
-            "file_moved_to_backup",
-            file_id=file_id,
-            backup_folder_id=self._backup_folder_id,
+    def _backup_folder_path(self) -> str:
+        """Ruta legible de Respaldo/yyyy-mm-dd/hh.mi.ss de la ejecución."""
+        return (
+            f"{self._config.source_path}/{self._config.backup_path}/"
+            f"{self._backup_date_str}/{self._backup_time_str}"
         )
-        return file_id
+
+    def _get_backup_folder(self) -> str:
+        """Folder de backup de la ejecución; se inicializa una sola vez (fecha/hora fija)."""
+        if self._backup_folder_id is None:
+            return self.init_backup_folder()
+        return self._backup_folder_id
 
     def backup_consolidated(self, consolidated_file_id: str, run_id: str) -> str:
         """
@@ -128,10 +180,8 @@ class FileLifecycleManager:
         Usa la fecha/hora inicializada con init_backup_folder().
         Retorna el ID del folder de backup.
         """
-        # Usar el folder de backup ya inicializado
-        if self._backup_folder_id is None:
-            # Si no se ha inicializado, hacerlo ahora
-            self.init_backup_folder()
+        # Usar el folder de backup de la ejecución
+        backup_folder_id = self._get_backup_folder()
 
         # Nombre del archivo de backup
         backup_name = f"consolidado_backup_prerun_{run_id[:8]}.xlsx"
@@ -139,12 +189,12 @@ class FileLifecycleManager:
         # DEBUG: Mostrar ruta completa del backup
         logger.debug(
             "debug_backup_path",
-            backup_path=f"{self._config.source_path}/{self._config.backup_path}/{self._backup_date_str}/{self._backup_time_str}/{backup_name}",
+            backup_path=f"{self._backup_folder_path()}/{backup_name}",
             backup_name=backup_name,
         )
 
         # Copiar el archivo consolidado al folder de backup
-        body = {"name": backup_name, "parents": [self._backup_folder_id]}
+        body = {"name": backup_name, "parents": [backup_folder_id]}
         params = {
             "fileId": consolidated_file_id,
             "body": body,
@@ -152,31 +202,25 @@ class FileLifecycleManager:
         if self._shared_drive_id:
             params["supportsAllDrives"] = True
 
-        result = self._service.files().copy(**params).execute()
+        result = execute_with_retry(self._service.files().copy(**params), idempotent=False)
         backup_file_id = result["id"]
 
         logger.info(
             "consolidated_backup_created",
             original_file_id=consolidated_file_id,
             backup_file_id=backup_file_id,
-            backup_folder_id=self._backup_folder_id,
+            backup_folder_id=backup_folder_id,
             backup_name=backup_name,
         )
 
-        return self._backup_folder_id
-
-    def _ensure_backup_folders(self) -> str:
-        """Crea la jerarquía Respaldo/yyyy-mm-dd/hh.mi.ss. Retorna folder ID del timestamp."""
-        # Usar hora local del sistema
-        now = datetime.now()
-        date_str = now.strftime("%Y-%m-%d")
-        time_str = now.strftime("%H.%M.%S")
-
-        backup_full = f"{self._config.source_path}/{self._config.backup_path}/{date_str}/{time_str}"
-        return self._path_resolver.ensure_path(backup_full)
+        return backup_folder_id
 
     def _move_file(self, file_id: str, from_folder_id: str, to_folder_id: str) -> None:
         """Mueve un archivo entre carpetas usando Drive API."""
+        execute_with_retry(self._move_request(file_id, from_folder_id, to_folder_id))
+
+    def _move_request(self, file_id: str, from_folder_id: str, to_folder_id: str) -> Any:
+        """Request files.update (sin ejecutar) que mueve un archivo entre carpetas."""
         params: dict[str, Any] = {
             "fileId": file_id,
             "body": {},
@@ -186,4 +230,4 @@ class FileLifecycleManager:
         if self._shared_drive_id:
             params["supportsAllDrives"] = True
 
-        self._service.files().update(**params).execute()
+        return self._service.files().update(**params)
@@ -0,0 +1,123 @@
+"""Armado y envío de emails HTML via Gmail API, compartido por los notificadores."""
+
+from __future__ import annotations
+
+import functools
+import re
+import tempfile
+from collections.abc import Sequence
+from email.generator import BytesGenerator
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+from typing import Any
+
+import structlog
+from googleapiclient.http import MediaIoBaseUpload
+
+from src.infrastructure.google_services import execute_with_retry
+
+logger = structlog.get_logger()
+
+GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
+
+# Patrones compilados una vez al importar el módulo
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+_BR_RE = re.compile(r"<br\s*/?>")
+_TAG_RE = re.compile(r"<[^>]+>")
+_NL_RE = re.compile(r"\n{3,}")
+
+# El mensaje MIME se arma en un archivo temporal que pasa a disco sobre este tamaño
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Sobre este tamaño el envío usa upload resumable (bajo él, un solo request multipart)
+_RESUMABLE_MIN_BYTES = 5 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=32)
+def _load_template(path_str: str, mtime_ns: int) -> tuple[str, ...]:
+    """Template separado una vez en (texto, placeholder, texto, ...); la clave incluye el
+    mtime, así un template editado se relee.
+
+    Solo los placeholders {word_chars} son campos: las llaves CSS ({ margin: 0; })
+    quedan dentro del texto literal.
+    """
+    return tuple(_PLACEHOLDER_RE.split(Path(path_str).read_text(encoding="utf-8")))
+
+
+def render_template(templates_dir: Path, template_name: str, variables: dict[str, Any]) -> str:
+    """Carga y renderiza un template HTML con sustitución de variables."""
+    template_path = templates_dir / template_name
+    try:
+        mtime_ns = template_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        msg = f"Template no encontrado: {template_path}"
+        raise FileNotFoundError(msg) from None
+
+    # Índices impares: nombre del placeholder; sin valor se deja tal cual
+    parts = list(_load_template(str(template_path), mtime_ns))
+    for i in range(1, len(parts), 2):
+        key = parts[i]
+        parts[i] = str(variables[key]) if key in variables else "{" + key + "}"
+    return "".join(parts)
+
+
+def html_to_plain(html: str) -> str:
+    """Conversión básica de HTML a texto plano para fallback."""
+    text = _BR_RE.sub("\n", html)
+    text = _TAG_RE.sub("", text)
+    text = _NL_RE.sub("\n\n", text)
+    return text.strip()
+
+
+def send_html_email(
+    service: Any,
+    sender: str,
+    subject: str,
+    html_body: str,
+    recipients: Sequence[str],
+    cc: Sequence[str] | None = None,
+    bcc: Sequence[str] | None = None,
+    attachments: list[Path] | None = None,
+) -> None:
+    """Arma el mensaje MIME (HTML + texto alternativo + adjuntos) y lo envía."""
+    msg = MIMEMultipart("mixed")
+    msg["From"] = sender
+    msg["To"] = ", ".join(recipients)
+    msg["Subject"] = subject
+    if cc:
+        msg["Cc"] = ", ".join(cc)
+    if bcc:
+        msg["Bcc"] = ", ".join(bcc)
+
+    # HTML + plain text alternativo
+    alternative = MIMEMultipart("alternative")
+    alternative.attach(MIMEText(html_to_plain(html_body), "plain"))
+    alternative.attach(MIMEText(html_body, "html"))
+    msg.attach(alternative)
+
+    for path in attachments or []:
+        if path.exists():
+            part = MIMEApplication(path.read_bytes())
+            part.add_header("Content-Disposition", "attachment", filename=path.name)
+            msg.attach(part)
+
+    # El mensaje se sube como message/rfc822 desde un archivo temporal, sin la copia
+    # base64url completa en memoria que exige el campo "raw"
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES) as fh:
+        BytesGenerator(fh, mangle_from_=False).flatten(msg)
+        size = fh.tell()
+        fh.seek(0)
+        media = MediaIoBaseUpload(
+            fh, mimetype="message/rfc822", resumable=size > _RESUMABLE_MIN_BYTES
+        )
+        send = service.users().messages().send(userId="me", media_body=media)
+        result = execute_with_retry(send, idempotent=False)
+
+    logger.info(
+        "gmail_sent",
+        message_id=result.get("id", "unknown"),
+        recipients=recipients,
+        cc=cc,
+        subject=subject,
+    )
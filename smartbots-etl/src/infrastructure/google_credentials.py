@@ -0,0 +1,103 @@
+"""Carga compartida de credenciales OAuth de Google (credentials.json + token.json)."""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import structlog
+from google.oauth2.credentials import Credentials
+
+from src.infrastructure import json_fast
+
+logger = structlog.get_logger()
+
+DEFAULT_TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+
+class TokenFileCredentials(Credentials):
+    """Credentials que reescriben token.json cada vez que google-auth las refresca.
+
+    El refresh es diferido: lo dispara el transporte autorizado ante un token vencido
+    o una respuesta 401, nunca la carga de las credenciales.
+    """
+
+    def __init__(self, *args: Any, token_path: str | Path | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._token_path = Path(token_path) if token_path is not None else None
+
+    def _make_copy(self) -> TokenFileCredentials:
+        cred = super()._make_copy()
+        cred._token_path = self._token_path
+        return cred
+
+    def refresh(self, request: Any) -> None:
+        super().refresh(request)
+        if self._token_path is not None:
+            save_oauth_token(self, self._token_path)
+            logger.info("oauth_token_refreshed", token_path=str(self._token_path))
+
+
+def load_oauth_credentials(
+    credentials_path: str, token_path: str, scopes: Sequence[str]
+) -> Credentials:
+    """Construye Credentials desde el cliente OAuth y el token almacenado (sin refrescar).
+
+    Conserva `expiry` de token.json para que `creds.expired` refleje la vigencia real;
+    un refresh posterior se persiste en el mismo token.json.
+    """
+    client_config = json_fast.loads(Path(credentials_path).read_bytes()).get("installed", {})
+    token_data = json_fast.loads(Path(token_path).read_bytes())
+
+    return TokenFileCredentials(
+        token=token_data.get("token"),
+        refresh_token=token_data.get("refresh_token"),
+        token_uri=token_data.get("token_uri", DEFAULT_TOKEN_URI),
+        client_id=token_data.get("client_id", client_config.get("client_id")),
+        client_secret=token_data.get("client_secret", client_config.get("client_secret")),
+        scopes=token_data.get("scopes", list(scopes)),
+        expiry=_parse_expiry(token_data.get("expiry")),
+        token_path=token_path,
+    )
+
+
+def _parse_expiry(raw: str | None) -> datetime | None:
+    """Expiry UTC naive como lo espera google-auth.
+
+    Sin dato (token.json antiguo) retorna None: el token se usa tal cual y se refresca
+    recién cuando la API responde 401.
+    """
+    if not raw:
+        return None
+    return datetime.strptime(raw.rstrip("Z").split(".")[0], "%Y-%m-%dT%H:%M:%S")
+
+
+def save_oauth_token(creds: Credentials, token_path: str | Path) -> None:
+    """Persiste el token (p. ej. tras un refresh) en token.json, incluida su expiración."""
+    json_fast.dump_atomic(json_fast.loads(creds.to_json()), token_path, indent=True)
+
+
+def build_google_credentials(
+    credentials_path: str, token_path: str, scopes: Sequence[str]
+) -> Credentials:
+    """Retorna credenciales OAuth compartibles entre adaptadores de Drive y Gmail.
+
+    Lee token.json una sola vez por proceso y no refresca al cargar: el transporte
+    autorizado refresca ante token vencido o 401 y el refresh se persiste en token.json.
+    La instancia se memoiza, de modo que un refresh es visible para todos los clientes.
+    """
+    return _build_google_credentials_cached(credentials_path, token_path, tuple(scopes))
+
+
+@functools.lru_cache(maxsize=4)
+def _build_google_credentials_cached(
+    credentials_path: str, token_path: str, scopes: tuple[str, ...]
+) -> Credentials:
+    return load_oauth_credentials(credentials_path, token_path, scopes)
+
+
+_cache_clear = _build_google_credentials_cached.cache_clear
+build_google_credentials.cache_clear = _cache_clear  # type: ignore[attr-defined]
@@ -1,21 +1,29 @@
 from pathlib import Path
 from typing import Any
+import tempfile
 
 from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseDownload
 import structlog
 
+from src.infrastructure.drive_files import LIST_PAGE_SIZE, XLSX_MIME, list_all_files, xlsx_media
+from src.infrastructure.drive_path_resolver import escape_query_value
+from src.infrastructure.google_services import (
+    build_google_service,
+    call_with_retry,
+    execute_with_retry,
+    thread_local_http,
+)
+
 logger = structlog.get_logger()
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
-XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
 class GoogleDriveAdapter:
     def __init__(self, credentials_path: str, shared_drive_id: str | None = None) -> None:
-        creds = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
-        self.service = build("drive", "v3", credentials=creds)
+        self._creds = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+        self.service = build_google_service("drive", "v3", self._creds)
         self._shared_drive_id = shared_drive_id
 
     def _drive_params(self, **extra: Any) -> dict[str, Any]:
@@ -39,12 +47,11 @@ class GoogleDriveAdapter:
         query = f"'{folder_id}' in parents and mimeType='{XLSX_MIME}' and trashed=false"
         params = self._list_params(
             q=query,
-            fields="files(id, name, modifiedTime)",
+            fields="nextPageToken, files(id, name, modifiedTime)",
             orderBy="modifiedTime desc",
+            pageSize=LIST_PAGE_SIZE,
         )
-        results = self.service.files().list(**params).execute()
-
-        files = results.get("files", [])
+        files = list_all_files(self.service, params)
         logger.info("drive_files_listed", folder_id=folder_id, count=len(files))
         return [
             {"file_id": f["id"], "name": f["name"], "modified_time": f["modifiedTime"]}
@@ -52,13 +59,14 @@ class GoogleDriveAdapter:
         ]
 
     def find_file_in_folder(self, folder_id: str, file_name: str) -> str | None:
-        query = f"'{folder_id}' in parents and name='{file_name}' and trashed=false"
+        name = escape_query_value(file_name)
+        query = f"'{folder_id}' in parents and name='{name}' and trashed=false"
         params = self._list_params(
             q=query,
             fields="files(id, name)",
             pageSize=1,
         )
-        results = self.service.files().list(**params).execute()
+        results = execute_with_retry(self.service.files().list(**params))
         files = results.get("files", [])
         if not files:
             return None
@@ -68,20 +76,22 @@ class GoogleDriveAdapter:
 
     def download_file(self, file_id: str, local_path: Path) -> Path:
         request = self.service.files().get_media(fileId=file_id, **self._drive_params())
+        # Transporte por hilo: las descargas pueden ejecutarse en paralelo
+        request.http = thread_local_http(self._creds)
         local_path.parent.mkdir(parents=True, exist_ok=True)
         with open(local_path, "wb") as f:
             downloader = MediaIoBaseDownload(f, request)
             done = False
             while not done:
-                _, done = downloader.next_chunk()
+                _, done = call_with_retry(downloader.next_chunk)
         logger.info("drive_file_downloaded", file_id=file_id, path=str(local_path))
         return local_path
 
     def upload_file(self, local_path: Path, folder_id: str, file_name: str) -> str:
         metadata: dict[str, Any] = {"name": file_name, "parents": [folder_id]}
-        media = MediaFileUpload(str(local_path), mimetype=XLSX_MIME)
+        media = xlsx_media(local_path)
         params = self._drive_params(body=metadata, media_body=media, fields="id")
-        file = self.service.files().create(**params).execute()
+        file = execute_with_retry(self.service.files().create(**params), idempotent=False)
         file_id = file["id"]
         logger.info("drive_file_uploaded", file_id=file_id, name=file_name)
         return file_id
@@ -89,21 +99,23 @@ class GoogleDriveAdapter:
     def create_backup(self, file_id: str, backup_name: str) -> str:
         body: dict[str, Any] = {"name": backup_name}
         params = self._drive_params(fileId=file_id, body=body)
-        backup = self.service.files().copy(**params).execute()
+        backup = execute_with_retry(self.service.files().copy(**params), idempotent=False)
         backup_id = backup["id"]
         logger.info("drive_backup_created", original=file_id, backup=backup_id)
         return backup_id
 
     def restore_backup(self, backup_file_id: str, original_file_id: str) -> None:
-        backup_path = Path(f"/tmp/restore_{backup_file_id}.xlsx")
-        self.download_file(backup_file_id, backup_path)
-        self.update_file(original_file_id, backup_path)
+        # Copia temporal propia de esta restauración; se elimina al terminar
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backup_path = Path(tmp_dir) / f"restore_{backup_file_id}.xlsx"
+            self.download_file(backup_file_id, backup_path)
+            self.update_file(original_file_id, backup_path)
         logger.warning("drive_backup_restored", backup=backup_file_id, original=original_file_id)
 
     def update_file(self, file_id: str, local_path: Path) -> None:
-        media = MediaFileUpload(str(local_path), mimetype=XLSX_MIME)
+        media = xlsx_media(local_path)
         params = self._drive_params(fileId=file_id, media_body=media)
-        self.service.files().update(**params).execute()
+        execute_with_retry(self.service.files().update(**params))
         logger.info("drive_file_updated", file_id=file_id)
 
     def move_file(self, file_id: str, from_folder_id: str, to_folder_id: str) -> None:
@@ -113,7 +125,7 @@ class GoogleDriveAdapter:
             addParents=to_folder_id,
             removeParents=from_folder_id,
         )
-        self.service.files().update(**params).execute()
+        execute_with_retry(self.service.files().update(**params))
         logger.info(
             "drive_file_moved",
             file_id=file_id,
@@ -0,0 +1,134 @@
+"""Fábrica memoizada de clientes de Google API (Drive, Gmail)."""
+
+from __future__ import annotations
+
+import functools
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import httplib2
+import structlog
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+logger = structlog.get_logger()
+
+MAX_ATTEMPTS = 6
+MAX_BACKOFF_SECONDS = 60.0
+# Errores transitorios del servidor: la operación pudo haberse aplicado igual
+_SERVER_ERROR_STATUSES = frozenset({500, 502, 503, 504})
+# 403 que son cuota/rate limit (no permisos)
+_RATE_LIMIT_REASONS = frozenset({"rateLimitExceeded", "userRateLimitExceeded"})
+
+
+def build_authorized_http(credentials: Any, timeout: int | None = None) -> AuthorizedHttp:
+    """Crea un transporte HTTP autorizado para compartir entre varios clientes.
+
+    Los clientes construidos con el mismo transporte reutilizan conexiones TLS
+    keep-alive hacia googleapis.com. httplib2 no es thread-safe: compartir solo
+    entre clientes usados desde un mismo hilo.
+    """
+    return AuthorizedHttp(credentials, http=httplib2.Http(timeout=timeout))
+
+
+_thread_local = threading.local()
+
+
+def thread_local_http(credentials: Any) -> AuthorizedHttp:
+    """Retorna el transporte autorizado propio del hilo actual para esas credenciales.
+
+    Permite ejecutar requests de un mismo cliente desde varios hilos
+    (request.http = thread_local_http(creds)) sin compartir el httplib2.Http.
+    """
+    transports: dict[int, AuthorizedHttp] | None = getattr(_thread_local, "transports", None)
+    if transports is None:
+        transports = _thread_local.transports = {}
+    http = transports.get(id(credentials))
+    if http is None or http.credentials is not credentials:
+        http = transports[id(credentials)] = build_authorized_http(credentials)
+    return http
+
+
+@functools.lru_cache(maxsize=8)
+def build_google_service(
+    api_name: str, version: str, credentials: Any = None, http: Any = None
+) -> Any:
+    """Construye (una vez por proceso) el cliente de una API de Google.
+
+    Usa los documentos de discovery incluidos en google-api-python-client
+    (static_discovery), evitando el fetch HTTP del discovery y la caché en disco.
+    La clave incluye las credenciales o el transporte: clientes con distintas
+    identidades no se comparten. Si se entrega http, ya debe estar autorizado.
+    """
+    auth: dict[str, Any] = {"http": http} if http is not None else {"credentials": credentials}
+    return build(
+        api_name,
+        version,
+        static_discovery=True,
+        cache_discovery=False,
+        **auth,
+    )
+
+
+def execute_with_retry(request: Any, idempotent: bool = True) -> Any:
+    """Ejecuta un request de Google API reintentando errores transitorios.
+
+    429 y 403 por rate limit se reintentan siempre: el request fue rechazado sin
+    aplicarse. 5xx y errores de conexión solo si idempotent; un create/copy/send
+    pudo haberse aplicado y reintentarlo lo duplicaría.
+    """
+    return call_with_retry(request.execute, idempotent)
+
+
+def call_with_retry[T](call: Callable[[], T], idempotent: bool = True) -> T:
+    """Llama call() con backoff exponencial (con jitter), respetando Retry-After."""
+    attempt = 1
+    while True:
+        try:
+            return call()
+        except (HttpError, ConnectionError, TimeoutError) as e:
+            if attempt >= MAX_ATTEMPTS or not is_retryable_error(e, idempotent):
+                raise
+            wait = retry_delay(e, attempt)
+            status = e.resp.status if isinstance(e, HttpError) else None
+        logger.warning("google_api_retry", status=status, attempt=attempt, wait_s=round(wait, 2))
+        time.sleep(wait)
+        attempt += 1
+
+
+def is_retryable_error(error: Exception, idempotent: bool = True) -> bool:
+    """Política de reintento compartida (ver execute_with_retry)."""
+    if not isinstance(error, HttpError):
+        return idempotent and isinstance(error, (ConnectionError, TimeoutError))
+    status = error.resp.status
+    if status == 429:
+        return True
+    if status == 403:
+        details = error.error_details if isinstance(error.error_details, list) else []
+        return any(
+            isinstance(d, dict) and d.get("reason") in _RATE_LIMIT_REASONS for d in details
+        )
+    return idempotent and status in _SERVER_ERROR_STATUSES
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Espera antes del reintento attempt + 1: Retry-After si viene, si no backoff."""
+    delay = _retry_after(error) if isinstance(error, HttpError) else None
+    return delay or _backoff(attempt)
+
+
+def _retry_after(error: HttpError) -> float | None:
+    """Segundos indicados por el header Retry-After (solo la forma numérica)."""
+    try:
+        seconds = float(error.resp.get("retry-after", ""))
+    except ValueError:
+        return None
+    return min(max(seconds, 0.0), MAX_BACKOFF_SECONDS)
+
+
+def _backoff(attempt: int) -> float:
+    return min(2 ** (attempt - 1) * (1 + random.random()), MAX_BACKOFF_SECONDS)  # noqa: S311
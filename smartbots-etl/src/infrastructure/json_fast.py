@@ -0,0 +1,44 @@
+"""Serialización JSON rápida: usa orjson si está disponible, si no la stdlib."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    import json
+
+    HAS_ORJSON = False
+
+
+def loads(data: bytes | str) -> Any:
+    """Decodifica JSON desde bytes o str."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Codifica a JSON UTF-8 (bytes); indent=True usa sangría de 2 espacios."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+def dump_atomic(obj: Any, path: str | Path, indent: bool = False) -> None:
+    """Escribe JSON en un archivo temporal hermano y lo reemplaza atómicamente.
+
+    Una interrupción a mitad de escritura deja intacto el archivo anterior.
+    """
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(dumps(obj, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -2,17 +2,25 @@
 
 from pathlib import Path
 from typing import Any
+import tempfile
 
-import json
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseDownload
 import structlog
 
+from src.infrastructure.google_credentials import load_oauth_credentials
+from src.infrastructure.drive_files import LIST_PAGE_SIZE, XLSX_MIME, list_all_files, xlsx_media
+from src.infrastructure.drive_path_resolver import escape_query_value
+from src.infrastructure.google_services import (
+    build_google_service,
+    call_with_retry,
+    execute_with_retry,
+    thread_local_http,
+)
+
 logger = structlog.get_logger()
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
-XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
 class OAuthGoogleDriveAdapter:
@@ -23,6 +31,9 @@ class OAuthGoogleDriveAdapter:
         credentials_path: str,
         token_path: str,
         shared_drive_id: str | None = None,
+        credentials: Credentials | None = None,
+        service: Any | None = None,
+        http: Any | None = None,
     ) -> None:
         """Initialize adapter with OAuth credentials from credentials.json and token.json.
 
@@ -30,51 +41,17 @@ class OAuthGoogleDriveAdapter:
             credentials_path: Path to OAuth client credentials (client_id, client_secret)
             token_path: Path to stored token with refresh_token
             shared_drive_id: Optional Shared Drive ID
+            credentials: Optional pre-built Credentials; skips reading token.json when given
+            service: Optional pre-built Drive v3 client (e.g. injected in tests)
+            http: Optional authorized HTTP transport shared with other Google clients
         """
-        creds_path = Path(credentials_path)
-        token_file = Path(token_path)
-
-        # Load OAuth client credentials
-        with open(creds_path) as f:
-            client_config = json.load(f).get("installed", {})
-
-        # Load stored token
-        with open(token_file) as f:
-            token_data = json.load(f)
-
-        # Create credentials with refresh capability
-        self._creds = Credentials(
-            token=token_data.get("token"),
-            refresh_token=token_data.get("refresh_token"),
-            token_uri=token_data.get("token_uri", "https://oauth2.googleapis.com/token"),
-            client_id=token_data.get("client_id", client_config.get("client_id")),
-            client_secret=token_data.get("client_secret", client_config.get("client_secret")),
-            scopes=token_data.get("scopes", SCOPES),
-        )
+        if credentials is None:
+            credentials = load_oauth_credentials(credentials_path, token_path, SCOPES)
+        self._creds = credentials
 
-        self._token_path = token_file
-        self.service = build("drive", "v3", credentials=self._creds)
+        self.service = service or build_google_service("drive", "v3", self._creds, http)
         self._shared_drive_id = shared_drive_id
 
-    def _save_token(self) -> None:
-        """Save updated token after refresh."""
-        token_data = {
-            "token": self._creds.token,
-            "refresh_token": self._creds.refresh_token,
-            "token_uri": self._creds.token_uri,
-            "client_id": self._creds.client_id,
-            "client_secret": self._creds.client_secret,
-            "scopes": self._creds.scopes,
-        }
-        self._token_path.write_text(json.dumps(token_data, indent=2))
-
-    def _ensure_valid_token(self) -> None:
-        """Refresh token if expired."""
-        if self._creds.expired:
-            self._creds.refresh(None)  # Uses built-in refresh
-            self._save_token()
-            logger.info("oauth_token_refreshed")
-
     def _drive_params(self, **extra: Any) -> dict[str, Any]:
         params: dict[str, Any] = dict(extra)
         if self._shared_drive_id:
@@ -90,20 +67,17 @@ class OAuthGoogleDriveAdapter:
         return params
 
     def list_source_files(self, folder_id: str) -> list[dict]:
-        self._ensure_valid_token()
         return self.list_xlsx_in_folder(folder_id)
 
     def list_xlsx_in_folder(self, folder_id: str) -> list[dict]:
-        self._ensure_valid_token()
         query = f"'{folder_id}' in parents and mimeType='{XLSX_MIME}' and trashed=false"
         params = self._list_params(
             q=query,
-            fields="files(id, name, modifiedTime)",
+            fields="nextPageToken, files(id, name, modifiedTime)",
             orderBy="modifiedTime desc",
+            pageSize=LIST_PAGE_SIZE,
         )
-        results = self.service.files().list(**params).execute()
-
-        files = results.get("files", [])
+        files = list_all_files(self.service, params)
         logger.info("drive_files_listed", folder_id=folder_id, count=len(files))
         return [
             {"file_id": f["id"], "name": f["name"], "modified_time": f["modifiedTime"]}
@@ -111,14 +85,14 @@ class OAuthGoogleDriveAdapter:
         ]
 
     def find_file_in_folder(self, folder_id: str, file_name: str) -> str | None:
-        self._ensure_valid_token()
-        query = f"'{folder_id}' in parents and name='{file_name}' and trashed=false"
+        name = escape_query_value(file_name)
+        query = f"'{folder_id}' in parents and name='{name}' and trashed=false"
         params = self._list_params(
             q=query,
             fields="files(id, name)",
             pageSize=1,
         )
-        results = self.service.files().list(**params).execute()
+        results = execute_with_retry(self.service.files().list(**params))
         files = results.get("files", [])
         if not files:
             return None
@@ -127,59 +101,57 @@ class OAuthGoogleDriveAdapter:
         return file_id
 
     def download_file(self, file_id: str, local_path: Path) -> Path:
-        self._ensure_valid_token()
         request = self.service.files().get_media(fileId=file_id, **self._drive_params())
+        # Transporte por hilo: las descargas pueden ejecutarse en paralelo
+        request.http = thread_local_http(self._creds)
         local_path.parent.mkdir(parents=True, exist_ok=True)
         with open(local_path, "wb") as f:
             downloader = MediaIoBaseDownload(f, request)
             done = False
             while not done:
-                _, done = downloader.next_chunk()
+                _, done = call_with_retry(downloader.next_chunk)
         logger.info("drive_file_downloaded", file_id=file_id, path=str(local_path))
         return local_path
 
     def upload_file(self, local_path: Path, folder_id: str, file_name: str) -> str:
-        self._ensure_valid_token()
         metadata: dict[str, Any] = {"name": file_name, "parents": [folder_id]}
-        media = MediaFileUpload(str(local_path), mimetype=XLSX_MIME)
+        media = xlsx_media(local_path)
         params = self._drive_params(body=metadata, media_body=media, fields="id")
-        file = self.service.files().create(**params).execute()
+        file = execute_with_retry(self.service.files().create(**params), idempotent=False)
         file_id = file["id"]
         logger.info("drive_file_uploaded", file_id=file_id, name=file_name)
         return file_id
 
     def create_backup(self, file_id: str, backup_name: str) -> str:
-        self._ensure_valid_token()
         body: dict[str, Any] = {"name": backup_name}
         params = self._drive_params(fileId=file_id, body=body)
-        backup = self.service.files().copy(**params).execute()
+        backup = execute_with_retry(self.service.files().copy(**params), idempotent=False)
         backup_id = backup["id"]
         logger.info("drive_backup_created", original=file_id, backup=backup_id)
         return backup_id
 
     def restore_backup(self, backup_file_id: str, original_file_id: str) -> None:
-        self._ensure_valid_token()
-        backup_path = Path(f"/tmp/restore_{backup_file_id}.xlsx")
-        self.download_file(backup_file_id, backup_path)
-        self.update_file(original_file_id, backup_path)
+        # Copia temporal propia de esta restauración; se elimina al terminar
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backup_path = Path(tmp_dir) / f"restore_{backup_file_id}.xlsx"
+            self.download_file(backup_file_id, backup_path)
+            self.update_file(original_file_id, backup_path)
         logger.warning("drive_backup_restored", backup=backup_file_id, original=original_file_id)
 
     def update_file(self, file_id: str, local_path: Path) -> None:
-        self._ensure_valid_token()
-        media = MediaFileUpload(str(local_path), mimetype=XLSX_MIME)
+        media = xlsx_media(local_path)
         params = self._drive_params(fileId=file_id, media_body=media)
-        self.service.files().update(**params).execute()
+        execute_with_retry(self.service.files().update(**params))
         logger.info("drive_file_updated", file_id=file_id)
 
     def move_file(self, file_id: str, from_folder_id: str, to_folder_id: str) -> None:
-        self._ensure_valid_token()
         params = self._drive_params(
             fileId=file_id,
             body={},
             addParents=to_folder_id,
             removeParents=from_folder_id,
         )
-        self.service.files().update(**params).execute()
+        execute_with_retry(self.service.files().update(**params))
         logger.info(
             "drive_file_moved",
             file_id=file_id,
@@ -159,6 +159,8 @@ class OfficialFormatExtractor:
             ordenes_column_exists=ordenes_column in df.columns,
         )
 
+        # Mismo objeto str para source_file en todos los registros del archivo
+        source_name = file_path.name
         for idx, row in df.iterrows():
             try:
                 if row.isna().all():
@@ -198,7 +200,7 @@ class OfficialFormatExtractor:
                     aprobado_por="",
                     estado_operaciones="",
                     fecha_aprobacion_operaciones="",
-                    source_file=file_path.name,
+                    source_file=source_name,
                 )
                 records.append(record)
 
@@ -251,6 +253,7 @@ class OfficialFormatExtractor:
 
         records = []
         invoice_column = "N° Factura"
+        source_name = file_path.name
 
         for idx, row in df.iterrows():
             try:
@@ -299,7 +302,7 @@ class OfficialFormatExtractor:
                     aprobado_por=str(row.get("Aprobado por:", "")),
                     estado_operaciones=str(row.get("Estado Operaciones", "")),
                     fecha_aprobacion_operaciones=str(row.get("Fecha Aprobación Operaciones", "")),
-                    source_file=file_path.name,
+                    source_file=source_name,
                 )
                 records.append(record)
 
@@ -331,7 +334,8 @@ class OfficialFormatExtractor:
             import fastexcel
 
             reader = fastexcel.read_excel(file_path)
-            df = reader.load_sheet_by_name(self._source_sheet).to_pandas()
+            # Sin header automático: la fila 1 no se consume y el índice 10 es la fila 11
+            df = reader.load_sheet_by_name(self._source_sheet, header_row=None).to_pandas()
             # Saltar 10 filas de encabezados
             df = df.iloc[10:] if len(df) > 10 else df
             # Usar la fila 11 como header
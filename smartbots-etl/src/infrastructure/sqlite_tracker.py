@@ -61,6 +61,7 @@ CREATE TABLE IF NOT EXISTS record_log (
 );
 
 CREATE INDEX IF NOT EXISTS idx_file_log_run ON file_log(run_uuid);
+CREATE INDEX IF NOT EXISTS idx_file_log_name ON file_log(file_name, file_modified_time);
 CREATE INDEX IF NOT EXISTS idx_record_log_run ON record_log(run_uuid);
 CREATE INDEX IF NOT EXISTS idx_record_log_file ON record_log(file_log_id);
 CREATE INDEX IF NOT EXISTS idx_record_log_action ON record_log(action);
@@ -239,6 +240,23 @@ class SqliteTracker:
         )
         return cursor.fetchone() is not None
 
+    def filter_unprocessed(self, files: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Filtra en una sola consulta los archivos ya procesados exitosamente.
+
+        files usa el formato de list_source_files ("name", "modified_time").
+        """
+        if not files:
+            return []
+        names = sorted({f["name"] for f in files})
+        placeholders = ",".join("?" * len(names))
+        cursor = self._conn.execute(
+            f"""SELECT file_name, file_modified_time FROM file_log
+               WHERE status='COMPLETED' AND file_name IN ({placeholders})""",  # noqa: S608
+            names,
+        )
+        processed = set(cursor.fetchall())
+        return [f for f in files if (f["name"], f["modified_time"]) not in processed]
+
     def get_run_summary(self, run_uuid: str) -> dict[str, Any]:
         """Retorna resumen de una ejecución."""
         cursor = self._conn.execute(
@@ -17,6 +17,7 @@ import pytest
 
 from src.application.config import (
     AppConfig,
+    DownloadsConfig,
     DrivePathsConfig,
     EmailConfig,
     ExcelConfig,
@@ -43,17 +44,20 @@ SOURCE_COLUMNS = [
     "Moneda",
 ]
 
+# Encabezados de la hoja Consolidado (independientes del código de producción)
 CONSOLIDATED_COLUMNS = [
-    "invoice_number",
-    "reference_number",
-    "carrier_name",
-    "invoice_date",
-    "description",
-    "net_amount",
-    "tax_amount",
-    "total_amount",
-    "currency",
-    "source_file",
+    "N° Factura",
+    "Empresa Transporte",
+    "Nave",
+    "Órdenes de Embarque",
+    "Guías de Despacho",
+    "Total Servicio ($)",
+    "Fecha Emisión",
+    "Fecha Recepción Digital",
+    "Aprobado por:",
+    "Estado Operaciones",
+    "Fecha Aprobación Operaciones",
+    "Observaciones",
 ]
 
 
@@ -69,9 +73,12 @@ def create_source_xlsx(
     """Create a source XLSX file with Spanish column names.
 
     Defaults to startrow=10 (row 11) to match OfficialFormatExtractor expectations.
+    A title in A1 keeps rows 1-10 in the sheet range, as in the official files.
     """
     df = pd.DataFrame(rows, columns=SOURCE_COLUMNS)
-    df.to_excel(path, sheet_name=sheet_name, index=False, engine="openpyxl", startrow=startrow)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=startrow)
+        writer.sheets[sheet_name]["A1"] = "DETALLE FACTURACIÓN CONTENEDORES"
     return path
 
 
@@ -83,10 +90,10 @@ def create_mixed_format_source_xlsx(
 ) -> Path:
     """Create a source XLSX file with mixed format (fixed cells + tabular data).
 
-    Fixed cells layout:
-    - B6: Empresa Transporte
-    - B7: Fecha Emisión
-    - B8: N° Factura
+    Fixed cells layout (OfficialFormatExtractor.FIXED_CELLS):
+    - C6: Empresa Transporte
+    - G3: Fecha Emisión
+    - C8: N° Factura
     - H6: Nave
     - H7: Puerto Embarque
     - F4: Aprobado por
@@ -100,9 +107,9 @@ def create_mixed_format_source_xlsx(
     ws = wb.active
     ws.title = sheet_name
 
-    ws["B6"] = fixed_cells.get("empresa_transporte")
-    ws["B7"] = fixed_cells.get("fecha_emision")
-    ws["B8"] = fixed_cells.get("numero_factura")
+    ws["C6"] = fixed_cells.get("empresa_transporte")
+    ws["G3"] = fixed_cells.get("fecha_emision")
+    ws["C8"] = fixed_cells.get("numero_factura")
     ws["H6"] = fixed_cells.get("nave")
     ws["H7"] = fixed_cells.get("puerto_embarque")
     ws["F4"] = fixed_cells.get("aprobado_por")
@@ -152,7 +159,7 @@ def create_consolidated_xlsx(
     path: Path,
     rows: list[dict] | None = None,
     sheet_name: str = "Consolidado",
-    header_row: int = 0,
+    header_row: int = 6,
 ) -> Path:
     """Create a consolidated XLSX file with standard column names."""
     if rows:
@@ -294,7 +301,7 @@ class FakeNotifier:
 
 @pytest.fixture
 def app_config(tmp_path: Path) -> AppConfig:
-    """Full AppConfig pointing to tmp_path for DB and credentials."""
+    """Full AppConfig pointing to tmp_path for DB, credentials and downloads."""
     return AppConfig(
         google=GoogleConfig(credentials_path=str(tmp_path / "creds.json")),
         drive=DrivePathsConfig(
@@ -321,6 +328,8 @@ def app_config(tmp_path: Path) -> AppConfig:
         ),
         tracking=TrackingConfig(db_path=str(tmp_path / "tracking.db")),
         logging=LoggingConfig(),
+        # Fuera de ./data/downloads: cada ejecución limpia su carpeta de descargas
+        downloads=DownloadsConfig(temp_path=str(tmp_path / "downloads")),
     )
 
 
@@ -364,8 +373,8 @@ def path_resolver() -> MagicMock:
 
 @pytest.fixture
 def lifecycle() -> MagicMock:
-    """Mock FileLifecycleManager (move_to_in_process / move_to_backup)."""
-    return MagicMock()
+    """Mock FileLifecycleManager (move_to_in_process / move_many_to_backup sin fallos)."""
+    return MagicMock(**{"move_many_to_backup.return_value": {}})
 
 
 @pytest.fixture
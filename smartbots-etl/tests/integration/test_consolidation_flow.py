@@ -10,6 +10,7 @@ import pandas as pd
 import pytest
 
 from tests.integration.conftest import (
+    CONSOLIDATED_COLUMNS,
     create_consolidated_xlsx,
     create_source_xlsx,
 )
@@ -183,14 +184,14 @@ def _register_mixed_source(
 
 def _register_consolidated(fake_drive, tmp_path, rows=None):
     path = tmp_path / "consolidado.xlsx"
-    create_consolidated_xlsx(path, rows, header_row=11)
+    create_consolidated_xlsx(path, rows)
     fake_drive.register("consolidated_file_id", path)
     fake_drive.set_find_result("consolidado.xlsx", "consolidated_file_id")
     return path
 
 
 def _read_result(consolidated_path: Path) -> pd.DataFrame:
-    return pd.read_excel(consolidated_path, sheet_name="Consolidado", engine="openpyxl", header=10)
+    return pd.read_excel(consolidated_path, sheet_name="Consolidado", engine="openpyxl", header=5)
 
 
 class TestSuccessFreshConsolidation:
@@ -220,39 +221,32 @@ class TestSuccessFreshConsolidation:
         assert not report.validation_errors
 
         df = _read_result(consolidated_path)
+        assert list(df.columns) == CONSOLIDATED_COLUMNS
         assert len(df) == 3
-        assert set(df["invoice_number"]) == {"FAC-001"}
+        assert set(df["N° Factura"]) == {"FAC-001"}
 
         assert len(fake_notifier.calls) == 1
-        assert "SUCCESS" in fake_notifier.calls[0]["subject"]
+        assert "EXITOSO" in fake_notifier.calls[0]["subject"]
 
 
 class TestUpsertUpdatesAndPreserves:
     def test_upsert_update_and_insert(self, tmp_path, fake_drive, fake_notifier, build_use_case):
         existing_rows = [
             {
-                "invoice_number": "FAC-001",
-                "reference_number": "REF-001",
-                "carrier_name": "Transportes Chile Ltda",
-                "invoice_date": "2026-01-15",
-                "description": "Flete Santiago-Valparaíso",
-                "net_amount": 100000,
-                "tax_amount": 19000,
-                "total_amount": 119000,
-                "currency": "CLP",
-                "source_file": "old_file.xlsx",
+                "N° Factura": "FAC-001",
+                "Empresa Transporte": "Transportes Chile Ltda",
+                "Órdenes de Embarque": "REF-001",
+                "Total Servicio ($)": 119000,
+                "Fecha Emisión": "2026-01-15",
+                "Observaciones": "Flete Santiago-Valparaíso",
             },
             {
-                "invoice_number": "FAC-004",
-                "reference_number": "REF-004",
-                "carrier_name": "Trans Norte Ltda",
-                "invoice_date": "2026-01-20",
-                "description": "Flete Arica-Santiago",
-                "net_amount": 250000,
-                "tax_amount": 47500,
-                "total_amount": 297500,
-                "currency": "CLP",
-                "source_file": "old_file.xlsx",
+                "N° Factura": "FAC-004",
+                "Empresa Transporte": "Trans Norte Ltda",
+                "Órdenes de Embarque": "REF-004",
+                "Total Servicio ($)": 297500,
+                "Fecha Emisión": "2026-01-20",
+                "Observaciones": "Flete Arica-Santiago",
             },
         ]
         consolidated_path = _register_consolidated(fake_drive, tmp_path, existing_rows)
@@ -261,12 +255,12 @@ class TestUpsertUpdatesAndPreserves:
             {
                 "N° Factura": "FAC-001",
                 "N° Referencia": "REF-001",
-                "Transportista": "Transportes Chile Ltda",
+                "Transportista": "Transportes Chile SpA",
                 "Fecha Factura": "15-01-2026",
-                "Descripción": "Flete Santiago-Valparaíso ACTUALIZADO",
-                "Monto Neto": 120000,
-                "IVA": 22800,
-                "Monto Total": 142800,
+                "Descripción": "Flete Santiago-Valparaíso",
+                "Monto Neto": 100000,
+                "IVA": 19000,
+                "Monto Total": 119000,
                 "Moneda": "CLP",
             },
             {
@@ -287,23 +281,24 @@ class TestUpsertUpdatesAndPreserves:
         report = build_use_case().execute()
 
         assert report.status == "SUCCESS"
+        # Upsert append-only: la PK existente (FAC-001) se omite, no se cuenta como update
         assert report.inserted_count == 1
-        assert report.updated_count == 1
+        assert report.updated_count == 0
         assert report.unchanged_count == 0
 
         df = _read_result(consolidated_path)
         assert len(df) == 3
-        assert set(df["invoice_number"]) == {"FAC-001", "FAC-004", "FAC-005"}
+        assert set(df["N° Factura"]) == {"FAC-001", "FAC-004", "FAC-005"}
 
         # Append-only behavior: FAC-001 was updated in source, but Excel remains UNTOUCHED
-        fac001 = df[df["invoice_number"] == "FAC-001"].iloc[0]
-        assert float(fac001["total_amount"]) == 119000.0  # Kept OLD value
+        fac001 = df[df["N° Factura"] == "FAC-001"].iloc[0]
+        assert fac001["Empresa Transporte"] == "Transportes Chile Ltda"  # Kept OLD value
 
-        fac004 = df[df["invoice_number"] == "FAC-004"].iloc[0]
-        assert float(fac004["total_amount"]) == 297500.0
+        fac004 = df[df["N° Factura"] == "FAC-004"].iloc[0]
+        assert float(fac004["Total Servicio ($)"]) == 297500.0
 
-        fac005 = df[df["invoice_number"] == "FAC-005"].iloc[0]
-        assert float(fac005["total_amount"]) == 357000.0
+        fac005 = df[df["N° Factura"] == "FAC-005"].iloc[0]
+        assert float(fac005["Total Servicio ($)"]) == 357000.0
 
 
 class TestPartialMixedFiles:
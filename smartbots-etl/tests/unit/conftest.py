@@ -0,0 +1,42 @@
+"""Unit test fakes shared across modules: HttpError factory and Drive batch fake."""
+
+from __future__ import annotations
+
+import json
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def http_error(
+    status: int, reason: str | None = None, retry_after: str | None = None
+) -> HttpError:
+    """HttpError de Google API con status, reason y Retry-After opcional."""
+    headers = {"status": status}
+    if retry_after is not None:
+        headers["retry-after"] = retry_after
+    errors = [{"reason": reason}] if reason else []
+    content = json.dumps({"error": {"errors": errors, "message": reason or "error"}})
+    return HttpError(httplib2.Response(headers), content.encode())
+
+
+class FakeBatch:
+    """Batch de Drive que responde cada sub-request con el error configurado (o éxito).
+
+    Una lista de errores se consume de a uno por intento (None = éxito).
+    """
+
+    def __init__(self, callback, errors: dict[str, Exception | list[Exception | None]]):
+        self._callback = callback
+        self._errors = errors
+        self.request_ids: list[str] = []
+
+    def add(self, request, request_id):
+        self.request_ids.append(request_id)
+
+    def execute(self):
+        for request_id in self.request_ids:
+            error = self._errors.get(request_id)
+            if isinstance(error, list):
+                error = error.pop(0) if error else None
+            self._callback(request_id, {}, error)
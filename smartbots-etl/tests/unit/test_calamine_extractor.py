@@ -0,0 +1,38 @@
+import openpyxl
+
+from src.application.config import ExcelConfig
+from src.infrastructure.calamine_extractor import CalamineExtractor
+
+
+def _write_source(path, data_rows: list[list]) -> None:
+    """Filas 1-10: encabezado del formato; fila 11: títulos de la tabla; datos desde la 12."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Detalle"
+    for row in range(1, 11):
+        ws.cell(row=row, column=1, value=f"encabezado {row}")
+    ws.append(["N°", "Empresa", "", "", "", "", "Referencia", "Fecha", "Total"])
+    for data in data_rows:
+        ws.append(data)
+    wb.save(path)
+
+
+class TestExtract:
+    def test_emits_data_rows_from_row_12_with_legacy_indices(self, tmp_path):
+        path = tmp_path / "fuente.xlsx"
+        _write_source(
+            path,
+            [
+                [1, "Trans A", None, None, None, None, "OE-1", "15-01-2026", 1000],
+                [2, None, None, None, None, None, "OE-2", "16-01-2026", 2000],
+                [3, "Trans B", None, None, None, None, "OE-3", "17-01-2026", 3000],
+            ],
+        )
+
+        records = CalamineExtractor(ExcelConfig(source_sheet="Detalle")).extract(path)
+
+        assert [(r.invoice_number, r.reference_number, str(r.total_amount)) for r in records] == [
+            ("10", "OE-1", "1000"),
+            ("12", "OE-3", "3000"),
+        ]
+        assert records[0].invoice_date == "2026-01-15"
@@ -1,3 +1,4 @@
+import os
 import tempfile
 from pathlib import Path
 
@@ -33,9 +34,16 @@ class TestLoadConfig:
         assert config.drive.in_process_folder == "En Proceso"
         assert config.drive.backup_path == "Respaldo"
         assert config.drive.consolidated_path == "Consolidado"
+        assert config.drive.path_cache is None
         assert config.tracking.db_path == "data/etl_tracking.db"
         assert config.logging.level == "INFO"
 
+    def test_unknown_key_raises(self, tmp_path):
+        data = _minimal_config()
+        data["drive"]["in_proces_folder"] = False
+        with pytest.raises(ValueError, match="in_proces_folder"):
+            load_config(_write_yaml(tmp_path, data))
+
     def test_missing_google_section_raises(self, tmp_path):
         data = _minimal_config()
         del data["google"]
@@ -91,6 +99,16 @@ class TestLoadConfig:
         assert isinstance(config.email.cc, tuple)
         assert isinstance(config.email.bcc, tuple)
 
+    def test_comma_separated_emails_become_tuples(self, tmp_path):
+        data = _minimal_config()
+        data["email"]["to"] = "a@test.com, b@test.com"
+        data["email"]["bcc"] = ""
+        data["email"]["cc"] = None
+        config = load_config(_write_yaml(tmp_path, data))
+        assert config.email.to == ("a@test.com", "b@test.com")
+        assert config.email.cc == ()
+        assert config.email.bcc == ()
+
     def test_expected_columns_become_tuple(self, tmp_path):
         data = _minimal_config()
         data["excel"] = {"expected_columns": ["Col A", "Col B"]}
@@ -132,3 +150,29 @@ class TestExcelConfigDefaults:
         assert (
             config.column_mapping["Fecha Aprobación Operaciones"] == "fecha_aprobacion_operaciones"
         )
+
+
+class TestLoadConfigCache:
+    def test_repeated_calls_return_same_instance(self, tmp_path):
+        path = _write_yaml(tmp_path, _minimal_config())
+        assert load_config(path) is load_config(path)
+
+    def test_modified_file_is_reloaded(self, tmp_path):
+        path = _write_yaml(tmp_path, _minimal_config())
+        first = load_config(path)
+
+        data = _minimal_config()
+        data["email"]["sender"] = "otro@test.com"
+        path.write_text(yaml.dump(data, default_flow_style=False), encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        second = load_config(path)
+        assert second is not first
+        assert second.email.sender == "otro@test.com"
+
+    def test_cache_clear_forces_reload(self, tmp_path):
+        path = _write_yaml(tmp_path, _minimal_config())
+        first = load_config(path)
+        load_config.cache_clear()
+        assert load_config(path) is not first
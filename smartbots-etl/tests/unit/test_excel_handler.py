@@ -0,0 +1,72 @@
+from copy import copy
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Font
+from openpyxl.styles.cell_style import StyleArray
+
+from src.infrastructure.excel_handler import OpenpyxlExcelHandler
+
+
+class TestFindNextEmptyRow:
+    def test_skips_formatted_empty_rows_and_gaps(self):
+        ws = openpyxl.Workbook().active
+        ws.cell(row=1, column=1, value="N° Factura")
+        ws.cell(row=2, column=1, value="F-1")
+        ws.cell(row=4, column=3, value="F-2")  # fila con hueco previo y dato fuera de col. 1
+        for row in range(5, 50):
+            ws.cell(row=row, column=1).font = Font(bold=True)
+
+        assert OpenpyxlExcelHandler._find_next_empty_row(ws, min_row=2) == 5
+
+    def test_returns_min_row_when_no_data(self):
+        ws = openpyxl.Workbook().active
+        ws.cell(row=1, column=1, value="N° Factura")
+        ws.cell(row=10, column=1).font = Font(bold=True)
+
+        assert OpenpyxlExcelHandler._find_next_empty_row(ws, min_row=2) == 2
+
+
+class TestOpenpyxlInternals:
+    """append() y _find_next_empty_row dependen de internals de openpyxl (versión fijada
+    en pyproject.toml); si cambian al actualizar, estos tests fallan primero."""
+
+    def test_cells_are_stored_by_row_and_column(self):
+        ws = openpyxl.Workbook().active
+        cell = ws.cell(row=3, column=2, value="x")
+
+        assert isinstance(ws._cells, dict)
+        assert ws._cells[(3, 2)] is cell
+
+    def test_style_array_is_shared_by_copy(self):
+        ws = openpyxl.Workbook().active
+        styled = ws.cell(row=1, column=1)
+        fresh = ws.cell(row=2, column=1)
+        assert fresh._style is None or fresh._style == StyleArray()
+
+        styled.font = Font(bold=True)
+        assert isinstance(styled._style, StyleArray)
+        fresh._style = copy(styled._style)
+
+        assert fresh.font.b
+
+
+class TestCreate:
+    def test_matches_pandas_values_with_styled_header(self, tmp_path):
+        df = pd.DataFrame({"N° Factura": [1.0, 2.0], "Nave": ["A", None]})
+        ours, theirs = tmp_path / "ours.xlsx", tmp_path / "pandas.xlsx"
+
+        OpenpyxlExcelHandler._create(df, ours, "Hoja")
+        df.to_excel(theirs, sheet_name="Hoja", index=False)
+
+        def values(path):
+            return list(openpyxl.load_workbook(path)["Hoja"].values)
+
+        assert values(ours) == values(theirs)
+
+        header, *data = openpyxl.load_workbook(ours)["Hoja"].rows
+        for cell in header:
+            assert cell.font.b
+            assert {cell.border.left.style, cell.border.bottom.style} == {"thin"}
+            assert (cell.alignment.horizontal, cell.alignment.vertical) == ("center", "top")
+        assert not any(cell.font.b or cell.border.left.style for row in data for cell in row)
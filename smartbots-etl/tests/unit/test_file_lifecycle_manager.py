@@ -0,0 +1,115 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.application.config import DrivePathsConfig
+from src.infrastructure import file_lifecycle_manager
+from src.infrastructure.file_lifecycle_manager import FileLifecycleManager
+from src.infrastructure.google_services import MAX_ATTEMPTS
+from tests.unit.conftest import FakeBatch, http_error
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits: list[float] = []
+    monkeypatch.setattr(file_lifecycle_manager.time, "sleep", waits.append)
+    return waits
+
+
+def _manager(errors: dict | None = None, resolver: MagicMock | None = None):
+    """Manager con el folder de backup de la ejecución ya inicializado, salvo que se
+    pase un resolver propio."""
+    service = MagicMock()
+    batches: list[FakeBatch] = []
+
+    def new_batch(callback):
+        batches.append(FakeBatch(callback, errors or {}))
+        return batches[-1]
+
+    service.new_batch_http_request.side_effect = new_batch
+    paths = DrivePathsConfig(source_path="Facturas")
+    if resolver is None:
+        resolver = MagicMock(**{"ensure_path.return_value": "backup-id"})
+        manager = FileLifecycleManager(service, resolver, paths)
+        manager.init_backup_folder()
+    else:
+        manager = FileLifecycleManager(service, resolver, paths)
+    return manager, service, batches
+
+
+class TestMoveManyToBackup:
+    def test_groups_moves_in_batches_and_reports_failures(self):
+        manager, service, batches = _manager({"f-1": OSError("403")})
+        file_ids = [f"f-{i}" for i in range(5)]
+
+        with patch("src.infrastructure.file_lifecycle_manager.DRIVE_BATCH_MAX_REQUESTS", 2):
+            failures = manager.move_many_to_backup(file_ids, in_process_folder_id="in-id")
+
+        assert [b.request_ids for b in batches] == [["f-0", "f-1"], ["f-2", "f-3"], ["f-4"]]
+        assert list(failures) == ["f-1"]
+        service.files().update.assert_called_with(
+            fileId="f-4", body={}, addParents="backup-id", removeParents="in-id"
+        )
+
+    def test_retries_sub_request_rejected_with_429(self, sleeps):
+        manager, _, batches = _manager({"f-1": [http_error(429, "rateLimitExceeded", "3"), None]})
+
+        failures = manager.move_many_to_backup(["f-0", "f-1", "f-2"], in_process_folder_id="in-id")
+
+        assert failures == {}
+        assert [b.request_ids for b in batches] == [["f-0", "f-1", "f-2"], ["f-1"]]
+        assert sleeps == [3]
+
+    def test_gives_up_on_persistent_rate_limit_and_skips_permission_errors(self, sleeps):
+        manager, _, batches = _manager(
+            {"f-0": http_error(403, "userRateLimitExceeded"), "f-1": http_error(403, "forbidden")}
+        )
+
+        failures = manager.move_many_to_backup(["f-0", "f-1", "f-2"], in_process_folder_id="in-id")
+
+        assert sorted(failures) == ["f-0", "f-1"]
+        assert [b.request_ids for b in batches[1:]] == [["f-0"]] * (MAX_ATTEMPTS - 1)
+        assert len(sleeps) == MAX_ATTEMPTS - 1
+
+    def test_requires_source_folder(self):
+        manager, _, _ = _manager()
+        with pytest.raises(ValueError, match="folder de origen"):
+            manager.move_many_to_backup(["f-0"])
+
+    def test_initializes_backup_folder_once_when_not_initialized(self):
+        resolver = MagicMock(**{"ensure_path.return_value": "lazy-backup-id"})
+        manager, service, _ = _manager(resolver=resolver)
+
+        manager.move_many_to_backup(["f-0"], in_process_folder_id="in-id")
+        manager.backup_consolidated("cons-id", "run-1234abcd")
+
+        (backup_path,), _ = resolver.ensure_path.call_args
+        resolver.ensure_path.assert_called_once()
+        assert backup_path.startswith("Facturas/Respaldo/")
+        assert service.files().copy.call_args.kwargs["body"]["parents"] == ["lazy-backup-id"]
+
+
+class TestMoveManyToSource:
+    def test_moves_back_from_in_process_to_source(self):
+        manager, service, batches = _manager({"f-1": OSError("403")})
+
+        failures = manager.move_many_to_source(["f-0", "f-1"], "src-id", "in-id")
+
+        assert [b.request_ids for b in batches] == [["f-0", "f-1"]]
+        assert list(failures) == ["f-1"]
+        service.files().update.assert_called_with(
+            fileId="f-1", body={}, addParents="src-id", removeParents="in-id"
+        )
+
+
+class TestMoveToInProcess:
+    def test_moves_with_single_update_and_no_backup_copy(self):
+        resolver = MagicMock(**{"ensure_path.return_value": "in-id"})
+        manager, service, _ = _manager(resolver=resolver)
+
+        manager.move_to_in_process("f-0", "src-id")
+
+        service.files().copy.assert_not_called()
+        service.files().update.assert_called_once_with(
+            fileId="f-0", body={}, addParents="in-id", removeParents="src-id"
+        )
@@ -1,16 +1,12 @@
+import os
 import re
-from pathlib import Path
+from email import message_from_bytes
+from unittest.mock import MagicMock
 
 import pytest
 
-from src.infrastructure.gmail_notifier import GmailNotifier
-
-
-class _FakeNotifier:
-    def __init__(self, templates_dir: Path):
-        self._templates_dir = templates_dir
-
-    _render_template = GmailNotifier._render_template
+from src.infrastructure.gmail_message import html_to_plain, render_template
+from src.infrastructure.oauth_gmail_notifier import OAuthGmailNotifier
 
 
 class TestRenderTemplate:
@@ -18,9 +14,8 @@ class TestRenderTemplate:
         template = tmp_path / "test.html"
         template.write_text("<p>{run_id} - {timestamp}</p>", encoding="utf-8")
 
-        notifier = _FakeNotifier(tmp_path)
-        result = notifier._render_template(
-            "test.html", {"run_id": "abc-123", "timestamp": "2026-02-11"}
+        result = render_template(
+            tmp_path, "test.html", {"run_id": "abc-123", "timestamp": "2026-02-11"}
         )
         assert "abc-123" in result
         assert "2026-02-11" in result
@@ -32,35 +27,87 @@ class TestRenderTemplate:
             encoding="utf-8",
         )
 
-        notifier = _FakeNotifier(tmp_path)
-        result = notifier._render_template("css.html", {"run_id": "xyz"})
+        result = render_template(tmp_path, "css.html", {"run_id": "xyz"})
         assert "{ margin: 0; color: #333; }" in result
         assert "xyz" in result
 
     def test_missing_template_raises(self, tmp_path):
-        notifier = _FakeNotifier(tmp_path)
         with pytest.raises(FileNotFoundError, match="no_existe.html"):
-            notifier._render_template("no_existe.html", {})
+            render_template(tmp_path, "no_existe.html", {})
 
     def test_unknown_placeholder_preserved(self, tmp_path):
         template = tmp_path / "partial.html"
         template.write_text("<p>{known} {unknown_var}</p>", encoding="utf-8")
 
-        notifier = _FakeNotifier(tmp_path)
-        result = notifier._render_template("partial.html", {"known": "YES"})
+        result = render_template(tmp_path, "partial.html", {"known": "YES"})
         assert "YES" in result
         assert "{unknown_var}" in result
 
+    def test_values_with_braces_are_not_reinterpreted(self, tmp_path):
+        template = tmp_path / "braces.html"
+        template.write_text("<p>{detail} {0}</p>", encoding="utf-8")
+
+        result = render_template(tmp_path, "braces.html", {"detail": "{run_id} { x }"})
+        assert result == "<p>{run_id} { x } {0}</p>"
+
+    def test_edited_template_is_reloaded(self, tmp_path):
+        template = tmp_path / "cached.html"
+        template.write_text("<p>v1 {run_id}</p>", encoding="utf-8")
+        assert render_template(tmp_path, "cached.html", {"run_id": "a"}) == "<p>v1 a</p>"
+
+        template.write_text("<p>v2 {run_id}</p>", encoding="utf-8")
+        stat = template.stat()
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert render_template(tmp_path, "cached.html", {"run_id": "b"}) == "<p>v2 b</p>"
+
 
 class TestHtmlToPlain:
     def test_strips_tags(self):
-        result = GmailNotifier._html_to_plain("<p>Hello <b>World</b></p>")
+        result = html_to_plain("<p>Hello <b>World</b></p>")
         assert result == "Hello World"
 
     def test_converts_br_to_newline(self):
-        result = GmailNotifier._html_to_plain("Line1<br/>Line2<br>Line3")
+        result = html_to_plain("Line1<br/>Line2<br>Line3")
         assert "Line1\nLine2\nLine3" in result
 
     def test_collapses_multiple_newlines(self):
-        result = GmailNotifier._html_to_plain("<p>A</p>\n\n\n\n<p>B</p>")
+        result = html_to_plain("<p>A</p>\n\n\n\n<p>B</p>")
         assert "\n\n\n" not in result
+
+
+class TestSend:
+    def test_uploads_message_as_rfc822_media(self, tmp_path):
+        (tmp_path / "body.html").write_text("<p>{run_id}</p>", encoding="utf-8")
+        attachment = tmp_path / "reporte final.xlsx"
+        attachment.write_bytes(b"PK\x03\x04datos")
+
+        service = MagicMock()
+        notifier = OAuthGmailNotifier(
+            "credentials.json",
+            "token.json",
+            sender="etl@example.com",
+            templates_dir=tmp_path,
+            credentials=MagicMock(),
+            service=service,
+        )
+        uploaded = {}
+
+        def capture(userId, media_body):
+            uploaded["mimetype"] = media_body.mimetype()
+            uploaded["resumable"] = media_body.resumable()
+            uploaded["message"] = message_from_bytes(media_body.getbytes(0, media_body.size()))
+            return MagicMock(**{"execute.return_value": {"id": "m-1"}})
+
+        service.users().messages().send.side_effect = capture
+        notifier.send(
+            "Asunto", "body.html", {"run_id": "r-1"}, ["a@example.com"], attachments=[attachment]
+        )
+
+        assert uploaded["mimetype"] == "message/rfc822"
+        assert uploaded["resumable"] is False
+        message = uploaded["message"]
+        assert message["Subject"] == "Asunto"
+        parts = [p for p in message.walk() if p.get_filename()]
+        assert parts[0].get_filename() == "reporte final.xlsx"
+        assert parts[0].get_payload(decode=True) == b"PK\x03\x04datos"
@@ -0,0 +1,96 @@
+import json
+from datetime import UTC, datetime, timedelta
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+
+from src.infrastructure.google_credentials import load_oauth_credentials, save_oauth_token
+
+SCOPES = ["https://www.googleapis.com/auth/drive"]
+
+
+@pytest.fixture
+def client_path(tmp_path):
+    path = tmp_path / "credentials.json"
+    path.write_text(json.dumps({"installed": {"client_id": "cid", "client_secret": "secret"}}))
+    return path
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _credentials(expiry: datetime) -> Credentials:
+    return Credentials(
+        token="access",
+        refresh_token="refresh",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="cid",
+        client_secret="secret",
+        scopes=SCOPES,
+        expiry=expiry,
+    )
+
+
+def test_expiry_survives_round_trip(tmp_path, client_path):
+    token_path = tmp_path / "token.json"
+    expiry = _utcnow().replace(microsecond=0) + timedelta(hours=1)
+
+    save_oauth_token(_credentials(expiry), token_path)
+    creds = load_oauth_credentials(str(client_path), str(token_path), SCOPES)
+
+    assert creds.expiry == expiry
+    assert not creds.expired
+    assert creds.token == "access"
+    assert creds.refresh_token == "refresh"
+    assert creds.scopes == SCOPES
+
+
+def test_past_expiry_is_reported_as_expired(tmp_path, client_path):
+    token_path = tmp_path / "token.json"
+
+    save_oauth_token(_credentials(_utcnow() - timedelta(minutes=1)), token_path)
+    creds = load_oauth_credentials(str(client_path), str(token_path), SCOPES)
+
+    assert creds.expired
+
+
+def test_legacy_token_falls_back_to_client_config(tmp_path, client_path):
+    token_path = tmp_path / "token.json"
+    token_path.write_text(json.dumps({"token": "access", "refresh_token": "refresh"}))
+
+    creds = load_oauth_credentials(str(client_path), str(token_path), SCOPES)
+
+    assert creds.client_id == "cid"
+    assert creds.client_secret == "secret"
+    assert creds.scopes == SCOPES
+    # Sin expiry almacenado el token se usa tal cual; se refresca recién ante un 401
+    assert creds.expiry is None
+    assert not creds.expired
+    assert creds.valid
+
+
+def _fake_refresh(self, request):
+    self.token = "renewed"
+
+
+def test_refresh_on_401_is_persisted(tmp_path, client_path):
+    token_path = tmp_path / "token.json"
+    token_path.write_text(json.dumps({"token": "access", "refresh_token": "refresh"}))
+    creds = load_oauth_credentials(str(client_path), str(token_path), SCOPES)
+    http = MagicMock()
+    http.request.side_effect = [
+        (MagicMock(status=401), b""),
+        (MagicMock(status=200), b"ok"),
+    ]
+
+    with patch.object(Credentials, "refresh", _fake_refresh):
+        _, content = AuthorizedHttp(creds, http=http).request("https://www.googleapis.com/x")
+
+    assert content == b"ok"
+    sent_headers = [c.kwargs["headers"]["authorization"] for c in http.request.call_args_list]
+    assert sent_headers == ["Bearer access", "Bearer renewed"]
+    assert json.loads(token_path.read_text())["token"] == "renewed"
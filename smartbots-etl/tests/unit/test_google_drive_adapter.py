@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+from src.infrastructure.drive_files import RESUMABLE_UPLOAD_MIN_BYTES, xlsx_media
+from src.infrastructure.oauth_google_drive_adapter import OAuthGoogleDriveAdapter
+
+
+def _adapter(pages: list[dict]) -> tuple[OAuthGoogleDriveAdapter, MagicMock]:
+    service = MagicMock()
+    adapter = OAuthGoogleDriveAdapter(
+        "credentials.json", "token.json", credentials=MagicMock(), service=service
+    )
+    list_call = service.files().list
+    list_call.return_value.execute.side_effect = pages
+    return adapter, list_call
+
+
+class TestListXlsxInFolder:
+    def test_follows_next_page_token(self):
+        adapter, list_call = _adapter(
+            [
+                {
+                    "files": [{"id": "a", "name": "a.xlsx", "modifiedTime": "t1"}],
+                    "nextPageToken": "p2",
+                },
+                {"files": [{"id": "b", "name": "b.xlsx", "modifiedTime": "t2"}]},
+            ]
+        )
+
+        files = adapter.list_xlsx_in_folder("folder-id")
+
+        assert [f["file_id"] for f in files] == ["a", "b"]
+        assert list_call.call_count == 2
+        assert "pageToken" not in list_call.call_args_list[0].kwargs
+        assert list_call.call_args_list[1].kwargs["pageToken"] == "p2"
+
+
+class TestXlsxMedia:
+    def test_resumable_only_above_threshold(self, tmp_path):
+        small = tmp_path / "small.xlsx"
+        small.write_bytes(b"x" * 10)
+        large = tmp_path / "large.xlsx"
+        large.write_bytes(b"x" * (RESUMABLE_UPLOAD_MIN_BYTES + 1))
+
+        assert xlsx_media(small).resumable() is False
+        assert xlsx_media(large).resumable() is True
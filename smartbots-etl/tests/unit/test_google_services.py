@@ -0,0 +1,58 @@
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.infrastructure import google_services
+from src.infrastructure.google_services import MAX_ATTEMPTS, call_with_retry
+from tests.unit.conftest import http_error
+
+
+class _Flaky:
+    """Llamada que falla con los errores dados y luego retorna "ok"."""
+
+    def __init__(self, *errors: Exception):
+        self._errors = list(errors)
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self._errors:
+            raise self._errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits: list[float] = []
+    monkeypatch.setattr(google_services.time, "sleep", waits.append)
+    return waits
+
+
+class TestCallWithRetry:
+    def test_honours_retry_after_on_rate_limit(self, sleeps):
+        call = _Flaky(http_error(429, retry_after="7"), http_error(403, "userRateLimitExceeded"))
+
+        assert call_with_retry(call, idempotent=False) == "ok"
+        assert call.calls == 3
+        assert sleeps[0] == 7
+        assert 2 <= sleeps[1] <= 4
+
+    def test_server_error_retried_only_when_idempotent(self, sleeps):
+        assert call_with_retry(_Flaky(http_error(503))) == "ok"
+
+        call = _Flaky(http_error(503))
+        with pytest.raises(HttpError):
+            call_with_retry(call, idempotent=False)
+        assert call.calls == 1
+
+    def test_permission_error_is_not_retried(self, sleeps):
+        call = _Flaky(http_error(403, "insufficientFilePermissions"))
+        with pytest.raises(HttpError):
+            call_with_retry(call)
+        assert sleeps == []
+
+    def test_gives_up_after_max_attempts(self, sleeps):
+        call = _Flaky(*[ConnectionResetError()] * MAX_ATTEMPTS)
+        with pytest.raises(ConnectionResetError):
+            call_with_retry(call)
+        assert call.calls == MAX_ATTEMPTS
+        assert all(wait <= google_services.MAX_BACKOFF_SECONDS for wait in sleeps)
@@ -11,18 +11,22 @@ def _mock_service(folder_results: dict[str, list[dict]] | None = None):
     def files_list(**kwargs):
         mock_resp = MagicMock()
         q = kwargs.get("q", "")
-        if folder_results:
-            for name, files in folder_results.items():
-                if f"name='{name}'" in q:
-                    mock_resp.execute.return_value = {"files": files}
-                    return mock_resp
-        mock_resp.execute.return_value = {"files": []}
+        matched = [
+            file
+            for name, files in (folder_results or {}).items()
+            if f"name='{name}'" in q
+            for file in files
+        ]
+        mock_resp.execute.return_value = {"files": matched}
         return mock_resp
 
     service.files().list.side_effect = files_list
     return service
 
 
+_SHARED_TOP_FOLDER = {"id": "id-1", "name": "Bot RPA", "parents": ["sd-1"]}
+
+
 class TestResolvePath:
     def test_single_segment(self):
         service = _mock_service({"Consolidado": [{"id": "folder-c", "name": "Consolidado"}]})
@@ -34,13 +38,74 @@ class TestResolvePath:
         service = _mock_service(
             {
                 "Bot RPA": [{"id": "id-1", "name": "Bot RPA"}],
-                "Tocornal": [{"id": "id-2", "name": "Tocornal"}],
-                "ETL Facturas": [{"id": "id-3", "name": "ETL Facturas"}],
+                "Tocornal": [{"id": "id-2", "name": "Tocornal", "parents": ["id-1"]}],
+                "ETL Facturas": [{"id": "id-3", "name": "ETL Facturas", "parents": ["id-2"]}],
             }
         )
         resolver = DrivePathResolver(service)
         result = resolver.resolve_path("Bot RPA/Tocornal/ETL Facturas")
         assert result == "id-3"
+        # "root" se busca directo; el resto de la cadena en una sola consulta
+        assert service.files().list.call_count == 2
+
+    def test_chain_lookup_from_my_drive_starts_below_root(self):
+        service = _mock_service(
+            {
+                "Bot RPA": [{"id": "id-1", "name": "Bot RPA", "parents": ["my-drive"]}],
+                "Tocornal": [{"id": "id-2", "name": "Tocornal", "parents": ["id-1"]}],
+                "ETL": [{"id": "id-3", "name": "ETL", "parents": ["id-2"]}],
+            }
+        )
+        resolver = DrivePathResolver(service)
+        assert resolver.resolve_path("Bot RPA/Tocornal/ETL") == "id-3"
+
+        # Los parents de la API traen el ID real de Mi unidad, no el alias "root":
+        # el primer segmento se busca directo y la cadena parte desde su ID
+        root_query, chain_query = (c.kwargs["q"] for c in service.files().list.call_args_list)
+        assert "'root' in parents" in root_query
+        assert "name='Bot RPA'" not in chain_query
+        assert "name='Tocornal'" in chain_query and "name='ETL'" in chain_query
+
+    def test_chain_lookup_in_shared_drive_uses_one_call(self):
+        service = _mock_service(
+            {
+                "Bot RPA": [{"id": "id-1", "name": "Bot RPA", "parents": ["sd-1"]}],
+                "ETL": [
+                    {"id": "otro", "name": "ETL", "parents": ["id-x"]},
+                    {"id": "id-2", "name": "ETL", "parents": ["id-1"]},
+                ],
+            }
+        )
+        resolver = DrivePathResolver(service, shared_drive_id="sd-1")
+        assert resolver.resolve_path("Bot RPA/ETL") == "id-2"
+        assert resolver.resolve_path("Bot RPA") == "id-1"
+        assert service.files().list.call_count == 1
+
+    def test_chain_miss_raises_without_extra_lookups(self):
+        service = _mock_service({"Bot RPA": [_SHARED_TOP_FOLDER]})
+        resolver = DrivePathResolver(service, shared_drive_id="sd-1")
+        with pytest.raises(DrivePathNotFoundError, match="ETL"):
+            resolver.resolve_path("Bot RPA/ETL")
+        assert service.files().list.call_count == 1
+
+    def test_truncated_chain_lookup_falls_back_per_segment(self):
+        service = _mock_service(
+            {
+                "Bot RPA": [{"id": "id-1", "name": "Bot RPA"}],
+                "ETL": [{"id": "id-2", "name": "ETL"}],
+            }
+        )
+        truncated = MagicMock()
+        truncated.execute.return_value = {"files": [], "nextPageToken": "next"}
+        per_segment = service.files().list.side_effect
+        service.files().list.side_effect = [
+            truncated,
+            per_segment(q="name='Bot RPA'"),
+            per_segment(q="name='ETL'"),
+        ]
+        resolver = DrivePathResolver(service, shared_drive_id="sd-1")
+        assert resolver.resolve_path("Bot RPA/ETL") == "id-2"
+        assert service.files().list.call_count == 3
 
     def test_cache_hit(self):
         service = _mock_service({"Consolidado": [{"id": "folder-c", "name": "Consolidado"}]})
@@ -55,6 +120,12 @@ class TestResolvePath:
         with pytest.raises(DrivePathNotFoundError, match="NoExiste"):
             resolver.resolve_path("NoExiste")
 
+    def test_escapes_quotes_in_folder_names(self):
+        service = _mock_service({"D\\'Agostino": [{"id": "id-d", "name": "D'Agostino"}]})
+        resolver = DrivePathResolver(service)
+        assert resolver.resolve_path("D'Agostino") == "id-d"
+        assert "name='D\\'Agostino'" in service.files().list.call_args.kwargs["q"]
+
     def test_shared_drive_params(self):
         service = _mock_service({"Test": [{"id": "t1", "name": "Test"}]})
         resolver = DrivePathResolver(service, shared_drive_id="sd-123")
@@ -87,6 +158,63 @@ class TestEnsurePath:
         assert result == "new-folder"
         service.files().create.assert_called_once()
 
+    def test_creates_missing_tail_after_chain_lookup(self):
+        service = _mock_service({"Bot RPA": [_SHARED_TOP_FOLDER]})
+        service.files().create.return_value.execute.side_effect = [{"id": "new-1"}, {"id": "new-2"}]
+
+        resolver = DrivePathResolver(service, shared_drive_id="sd-1")
+        assert resolver.ensure_path("Bot RPA/ETL/2026") == "new-2"
+        assert service.files().list.call_count == 1
+        parents = [c.kwargs["body"]["parents"] for c in service.files().create.call_args_list]
+        assert parents == [["id-1"], ["new-1"]]
+
+
+class TestPersistentCache:
+    def test_reuses_cache_across_instances(self, tmp_path):
+        cache_path = tmp_path / "paths.json"
+        service = _mock_service(
+            {
+                "Bot RPA": [{"id": "id-1", "name": "Bot RPA"}],
+                "ETL": [{"id": "id-2", "name": "ETL"}],
+            }
+        )
+        DrivePathResolver(service, cache_path=cache_path).resolve_path("Bot RPA/ETL")
+        assert service.files().list.call_count == 2
+
+        result = DrivePathResolver(service, cache_path=cache_path).resolve_path("Bot RPA/ETL")
+        assert result == "id-2"
+        assert service.files().list.call_count == 2
+
+    def test_ignores_cache_from_other_drive(self, tmp_path):
+        cache_path = tmp_path / "paths.json"
+        service = _mock_service({"ETL": [{"id": "id-1", "name": "ETL"}]})
+        DrivePathResolver(service, cache_path=cache_path).resolve_path("ETL")
+
+        resolver = DrivePathResolver(service, shared_drive_id="sd-1", cache_path=cache_path)
+        resolver.resolve_path("ETL")
+        assert service.files().list.call_count == 2
+
+    def test_invalidate_forgets_related_paths(self, tmp_path):
+        cache_path = tmp_path / "paths.json"
+        service = _mock_service(
+            {
+                "Bot RPA": [{"id": "id-1", "name": "Bot RPA"}],
+                "ETL": [{"id": "id-2", "name": "ETL"}],
+                "Otro": [{"id": "id-3", "name": "Otro"}],
+            }
+        )
+        resolver = DrivePathResolver(service, cache_path=cache_path)
+        resolver.resolve_path("Bot RPA/ETL")
+        resolver.resolve_path("Otro")
+
+        assert resolver.invalidate("Bot RPA/ETL") is True
+        assert resolver.invalidate("Bot RPA/ETL") is False
+
+        reloaded = DrivePathResolver(service, cache_path=cache_path)
+        reloaded.resolve_path("Otro")
+        reloaded.resolve_path("Bot RPA/ETL")
+        assert service.files().list.call_count == 5
+
 
 class TestDetectSharedDrive:
     def test_returns_drive_id(self):
@@ -0,0 +1,53 @@
+import importlib.util
+from contextlib import ExitStack
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+_SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "run_consolidation.py"
+
+# Adaptadores con I/O externo (Google, logging a disco); el tracker SQLite es real
+_STUBBED = [
+    "src.infrastructure.logging_config.setup_logging",
+    "src.infrastructure.google_credentials.build_google_credentials",
+    "src.infrastructure.google_services.build_authorized_http",
+    "src.infrastructure.oauth_google_drive_adapter.OAuthGoogleDriveAdapter",
+    "src.infrastructure.drive_path_resolver.DrivePathResolver",
+    "src.infrastructure.file_lifecycle_manager.FileLifecycleManager",
+    "src.infrastructure.oauth_gmail_notifier.OAuthGmailNotifier",
+]
+
+
+@pytest.fixture
+def script():
+    spec = importlib.util.spec_from_file_location("run_consolidation", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestMain:
+    @pytest.mark.parametrize(("has_errors", "exit_code"), [(False, 0), (True, 1)])
+    def test_runs_use_case_with_stubbed_adapters(
+        self, script, tmp_path, monkeypatch, has_errors, exit_code
+    ):
+        config = MagicMock()
+        config.tracking.db_path = str(tmp_path / "tracking.db")
+        monkeypatch.setattr(script, "load_config", lambda path: config)
+        monkeypatch.setattr("sys.argv", ["run_consolidation.py", "config.yaml"])
+        use_case = MagicMock()
+        use_case.return_value.execute.return_value.has_errors = has_errors
+
+        with ExitStack() as stack:
+            for target in _STUBBED:
+                stack.enter_context(patch(target))
+            stack.enter_context(
+                patch(
+                    "src.application.use_cases.consolidate_invoices.ConsolidateInvoicesUseCase",
+                    use_case,
+                )
+            )
+            assert script.main() == exit_code
+
+        assert use_case.call_args.kwargs["tracker"].__class__.__name__ == "SqliteTracker"
@@ -135,3 +135,18 @@ class TestIdempotency:
         fid = tracker.log_file_start("run-022", "test.xlsx", "d-1", "2026-01-15T10:00:00Z")
         tracker.log_file_finish(fid, "COMPLETED", 10, 10, 0, None)
         assert tracker.is_file_processed("test.xlsx", "2026-01-16T10:00:00Z") is False
+
+    def test_filter_unprocessed_excludes_completed_files(self, tracker):
+        tracker.start_run("run-023")
+        fid = tracker.log_file_start("run-023", "done.xlsx", "d-1", "2026-01-15T10:00:00Z")
+        tracker.log_file_finish(fid, "COMPLETED", 10, 10, 0, None)
+        files = [
+            {"file_id": "d-1", "name": "done.xlsx", "modified_time": "2026-01-15T10:00:00Z"},
+            {"file_id": "d-1", "name": "done.xlsx", "modified_time": "2026-01-16T10:00:00Z"},
+            {"file_id": "d-2", "name": "new.xlsx", "modified_time": "2026-01-15T10:00:00Z"},
+        ]
+        pending = tracker.filter_unprocessed(files)
+        assert [(f["name"], f["modified_time"]) for f in pending] == [
+            ("done.xlsx", "2026-01-16T10:00:00Z"),
+            ("new.xlsx", "2026-01-15T10:00:00Z"),
+        ]
@@ -65,6 +65,12 @@ class TestDateParsing:
         with pytest.raises(ValueError, match="Formato de fecha"):
             transformer._parse_date("31-13-2026")
 
+    def test_remembers_last_successful_format(self, transformer):
+        assert transformer._parse_date("2026-02-15") == date(2026, 2, 15)
+        assert transformer._last_date_format == "%Y-%m-%d"
+        assert transformer._parse_date("15-02-2026") == date(2026, 2, 15)
+        assert transformer._last_date_format == "%d-%m-%Y"
+
 
 class TestRowTransform:
     def test_transforms_complete_row(self, transformer):
@@ -89,3 +95,101 @@ class TestRowTransform:
         assert record.dispatch_guides == "GD-001"
         assert record.total_amount == Decimal("11900")
         assert record.source_file == "test.xlsx"
+
+    def test_headers_match_exactly(self, transformer):
+        row = {
+            " N° Factura ": "F-101",
+            "Empresa Transporte": "Beta",
+            "Órdenes de Embarque": "GD-201",
+            "Fecha Emisión": "15-02-2026",
+        }
+        with pytest.raises(KeyError, match="invoice_number"):
+            transformer.transform_row(row, "test.xlsx")
+
+    def test_later_mapping_entry_wins_over_column_order(self):
+        config = ExcelConfig(
+            column_mapping={"Factura": "invoice_number", "N° Factura": "invoice_number"}
+        )
+        mapped = RowTransformer(config)._apply_column_mapping(
+            {"N° Factura": "F-2", "Factura": "F-1", "invoice_number": "F-0"}
+        )
+        assert mapped == {"invoice_number": "F-2"}
+
+    def test_column_lookup_is_read_only(self):
+        lookup = ExcelConfig().column_lookup
+        assert lookup["N° Factura"] == "invoice_number"
+        assert lookup["invoice_number"] == "invoice_number"
+        with pytest.raises(TypeError):
+            lookup["otra"] = "x"  # type: ignore[index]
+
+
+class TestDataFrameTransform:
+    def test_matches_row_transform_and_reports_errors(self, transformer):
+        import pandas as pd
+
+        df = pd.DataFrame(
+            [
+                {
+                    "N° Factura": "F-1",
+                    "Empresa Transporte": " Beta ",
+                    "Órdenes de Embarque": "R-1",
+                    "Total Servicio ($)": "1.234",
+                    "Fecha Emisión": "15-02-2026",
+                },
+                {
+                    "N° Factura": "F-2",
+                    "Empresa Transporte": "Beta",
+                    "Órdenes de Embarque": "R-2",
+                    "Total Servicio ($)": "N/A",
+                    "Fecha Emisión": "15-02-2026",
+                },
+            ],
+            index=[7, 8],
+        )
+        records, errors = transformer.transform_dataframe(df, "test.xlsx")
+
+        expected = transformer.transform_row(df.loc[7].to_dict(), "test.xlsx")
+        assert len(records) == 1
+        assert records[0].primary_key == expected.primary_key
+        assert records[0].carrier_name == "Beta"
+        assert records[0].total_amount == Decimal("1234")
+        assert [idx for idx, _ in errors] == [8]
+        assert "Monto inválido" in str(errors[0][1])
+
+    def test_shares_repeated_low_cardinality_strings(self, transformer):
+        import pandas as pd
+
+        df = pd.DataFrame(
+            [
+                {
+                    "N° Factura": f"F-{i}",
+                    "Empresa Transporte": carrier,
+                    "Órdenes de Embarque": f"R-{i}",
+                    "Total Servicio ($)": "100",
+                    "Fecha Emisión": "15-02-2026",
+                }
+                for i, carrier in enumerate([" Beta", "Beta ", "Beta"])
+            ]
+        )
+        records, _ = transformer.transform_dataframe(df, "test.xlsx")
+        row_record = transformer.transform_row(df.iloc[0].to_dict(), "test.xlsx")
+
+        carriers = {id(r.carrier_name) for r in records + [row_record]}
+        assert len(carriers) == 1
+
+    def test_equal_values_of_different_type_are_converted_separately(self, transformer):
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "N° Factura": pd.Series([1, 1.0, True], dtype=object),
+                "Empresa Transporte": "Beta",
+                "Órdenes de Embarque": "R-1",
+                "Total Servicio ($)": "100",
+                "Fecha Emisión": "15-02-2026",
+            }
+        )
+        records, errors = transformer.transform_dataframe(df, "test.xlsx")
+
+        assert errors == []
+        assert [r.invoice_number for r in records] == ["1", "1.0", "True"]
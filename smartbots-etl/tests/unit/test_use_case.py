@@ -1,11 +1,21 @@
+import os
+import time
+from dataclasses import replace
 from decimal import Decimal
 from datetime import date
+from operator import attrgetter
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
 
-from src.application.use_cases.consolidate_invoices import ConsolidateInvoicesUseCase
+from src.application.dtos import ExecutionReport
+from src.application.use_cases.consolidate_invoices import (
+    CONSOLIDATED_COLUMNS,
+    STALE_RUN_DIR_SECONDS,
+    ConsolidateInvoicesUseCase,
+)
+from src.domain.entities import InvoiceRecord
 from src.application.config import (
     AppConfig,
     GoogleConfig,
@@ -19,7 +29,7 @@ from src.application.config import (
 
 
 @pytest.fixture
-def config():
+def config(tmp_path):
     return AppConfig(
         google=GoogleConfig(credentials_path="/tmp/creds.json"),
         drive=DrivePathsConfig(source_path="Bot RPA/ETL"),
@@ -36,10 +46,28 @@ def config():
         ),
         tracking=TrackingConfig(),
         logging=LoggingConfig(),
-        downloads=DownloadsConfig(),
+        downloads=DownloadsConfig(temp_path=str(tmp_path / "downloads")),
     )
 
 
+def _record(invoice: str, total: str = "100") -> InvoiceRecord:
+    return InvoiceRecord(
+        invoice_number=invoice,
+        reference_number="REF-1",
+        carrier_name="Beta",
+        ship_name="",
+        dispatch_guides="",
+        invoice_date=date(2026, 1, 15),
+        description="",
+        net_amount=Decimal(total),
+        tax_amount=Decimal("0"),
+        total_amount=Decimal(total),
+    )
+
+
+_GETTERS = {column: attrgetter(name) for column, name in CONSOLIDATED_COLUMNS.items()}
+
+
 @pytest.fixture
 def mocks():
     return {
@@ -47,9 +75,9 @@ def mocks():
         "reader": MagicMock(),
         "writer": MagicMock(),
         "notifier": MagicMock(),
-        "tracker": MagicMock(),
+        "tracker": MagicMock(**{"filter_unprocessed.side_effect": list}),
         "path_resolver": MagicMock(),
-        "lifecycle": MagicMock(),
+        "lifecycle": MagicMock(**{"move_many_to_backup.return_value": {}}),
     }
 
 
@@ -82,7 +110,6 @@ class TestConsolidateInvoicesUseCase:
             {"file_id": "id-1", "name": "test.xlsx", "modified_time": "2026-01-01"}
         ]
         mocks["drive"].create_backup.return_value = "backup-id"
-        mocks["tracker"].is_file_processed.return_value = False
         mocks["tracker"].log_file_start.return_value = 1
 
         mocks["reader"].read.side_effect = Exception("corrupt file")
@@ -112,3 +139,266 @@ class TestConsolidateInvoicesUseCase:
         report = uc.execute()
 
         assert report.status == "ERROR"
+
+    def test_downloads_only_pending_files(self, config, mocks):
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": "id-1", "name": "done.xlsx", "modified_time": "2026-01-01"},
+            {"file_id": "id-2", "name": "new.xlsx", "modified_time": "2026-01-02"},
+        ]
+        mocks["tracker"].filter_unprocessed.side_effect = lambda files: [
+            f for f in files if f["name"] != "done.xlsx"
+        ]
+        mocks["tracker"].log_file_start.return_value = 1
+
+        uc = ConsolidateInvoicesUseCase(**mocks, config=config)
+        uc.execute()
+
+        downloads = mocks["drive"].download_file.call_args_list
+        source_downloads = [c.args[0] for c in downloads if c.args[0] != "consol-id"]
+        assert source_downloads == ["id-2"]
+        mocks["tracker"].log_file_start.assert_called_once()
+
+    def test_status_is_error_when_every_attempted_file_fails(self, config, mocks):
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": "id-1", "name": "done.xlsx", "modified_time": "2026-01-01"},
+            {"file_id": "id-2", "name": "new.xlsx", "modified_time": "2026-01-02"},
+        ]
+        mocks["tracker"].filter_unprocessed.side_effect = lambda files: [
+            f for f in files if f["name"] != "done.xlsx"
+        ]
+        mocks["tracker"].log_file_start.return_value = 1
+        mocks["reader"].read.side_effect = Exception("corrupt file")
+
+        report = ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+        # done.xlsx ya se procesó en otra ejecución: no convierte el fallo en PARTIAL
+        assert report.total_files == 2
+        assert report.files_with_errors == ["new.xlsx"]
+        assert report.status == "ERROR"
+
+
+def _execute_with_records(
+    config, mocks, file_records: list[list[InvoiceRecord]], existing=()
+) -> ExecutionReport:
+    """Ejecuta el caso de uso con un archivo fuente por lista de registros y el consolidado
+    con los registros existing."""
+    mocks["path_resolver"].ensure_path.return_value = "folder-id"
+    mocks["drive"].find_file_in_folder.return_value = "consol-id"
+    mocks["drive"].list_source_files.return_value = [
+        {"file_id": f"id-{i}", "name": f"f{i}.xlsx", "modified_time": "2026-01-01"}
+        for i in range(len(file_records))
+    ]
+    mocks["tracker"].log_file_start.side_effect = range(1, len(file_records) + 1)
+    mocks["reader"].read.return_value = pd.DataFrame(
+        {column: [getter(r) for r in existing] for column, getter in _GETTERS.items()}
+    )
+    records = {f"id-{i}": recs for i, recs in enumerate(file_records)}
+    downloaded = {}
+    mocks["drive"].download_file.side_effect = lambda file_id, path: downloaded.update(
+        {path: file_id}
+    )
+
+    extractor = MagicMock()
+    extractor.return_value.validation_errors = []
+    extractor.return_value.extract.side_effect = lambda path: records[downloaded[path]]
+    target = "src.application.use_cases.consolidate_invoices.OfficialFormatExtractor"
+    with patch(target, extractor):
+        return ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+
+class TestUpsert:
+    def test_only_missing_records_are_new(self, config, mocks):
+        report = _execute_with_records(
+            config,
+            mocks,
+            [[_record("F-2"), _record("F-3")], [_record("F-3")]],
+            existing=[_record("F-1"), _record("F-2")],
+        )
+
+        assert report.status == "SUCCESS"
+        assert report.inserted_count == 1
+        written = mocks["writer"].write.call_args.args[0]
+        assert written["N° Factura"].tolist() == ["F-3"]
+
+    def test_existing_record_is_not_overwritten(self, config, mocks):
+        report = _execute_with_records(
+            config,
+            mocks,
+            [[_record("F-1", "999"), _record("F-2")]],
+            existing=[_record("F-1", "100")],
+        )
+
+        # El consolidado conserva F-1 con 100: el total no cuadra y el archivo falla entero
+        assert report.files_with_errors == ["f0.xlsx"]
+        assert report.inserted_count == 0
+        mocks["writer"].write.assert_not_called()
+
+
+class TestRecordLogQueue:
+    def test_flushes_in_fixed_size_chunks(self, config, mocks):
+        target = "src.application.use_cases.consolidate_invoices.RECORD_LOG_FLUSH_SIZE"
+        with patch(target, 2):
+            _execute_with_records(
+                config, mocks, [[_record(f"F-{i}") for i in range(3)], [_record("F-9")] * 2]
+            )
+
+        sizes = [len(c.args[0]) for c in mocks["tracker"].log_records_batch.call_args_list]
+        assert sizes == [2, 2, 1]
+
+
+class TestConsolidatedWrittenOnce:
+    def test_downloads_and_uploads_consolidated_once(self, config, mocks):
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": f"id-{i}", "name": f"f{i}.xlsx", "modified_time": "2026-01-01"}
+            for i in range(2)
+        ]
+        mocks["tracker"].log_file_start.side_effect = [1, 2]
+        mocks["reader"].read.return_value = pd.DataFrame()
+        records = {"id-0": [_record("F-1")], "id-1": [_record("F-1"), _record("F-2")]}
+        downloaded = {}
+        mocks["drive"].download_file.side_effect = lambda file_id, path: downloaded.update(
+            {path: file_id}
+        )
+
+        extractor = MagicMock()
+        extractor.return_value.validation_errors = []
+        extractor.return_value.extract.side_effect = lambda path: records[downloaded[path]]
+        target = "src.application.use_cases.consolidate_invoices.OfficialFormatExtractor"
+        with patch(target, extractor):
+            report = ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+        assert report.status == "SUCCESS"
+        assert report.inserted_count == 2
+        mocks["reader"].read.assert_called_once()
+        mocks["writer"].write.assert_called_once()
+        mocks["drive"].update_file.assert_called_once()
+        written = mocks["writer"].write.call_args.args[0]
+        assert written["N° Factura"].tolist() == ["F-1", "F-2"]
+        mocks["lifecycle"].move_many_to_backup.assert_called_once_with(["id-0", "id-1"])
+        mocks["tracker"].log_records_batch.assert_called_once()
+        logged = mocks["tracker"].log_records_batch.call_args.args[0]
+        assert [row["file_log_id"] for row in logged] == [1, 2, 2]
+
+    def test_failed_consolidated_read_is_retried_by_next_file(self, config, mocks):
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": f"id-{i}", "name": f"f{i}.xlsx", "modified_time": "2026-01-01"}
+            for i in range(2)
+        ]
+        mocks["tracker"].log_file_start.side_effect = [1, 2]
+        mocks["reader"].read.side_effect = [OSError("red"), pd.DataFrame()]
+
+        extractor = MagicMock()
+        extractor.return_value.validation_errors = []
+        extractor.return_value.extract.return_value = [_record("F-1")]
+        target = "src.application.use_cases.consolidate_invoices.OfficialFormatExtractor"
+        with patch(target, extractor):
+            report = ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+        assert report.status == "PARTIAL"
+        assert report.files_with_errors == ["f0.xlsx"]
+        assert mocks["reader"].read.call_count == 2
+        assert report.inserted_count == 1
+
+    def test_failed_backup_move_only_fails_that_file(self, config, mocks):
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": f"id-{i}", "name": f"f{i}.xlsx", "modified_time": "2026-01-01"}
+            for i in range(2)
+        ]
+        mocks["tracker"].log_file_start.side_effect = [1, 2]
+        mocks["reader"].read.return_value = pd.DataFrame()
+        mocks["lifecycle"].move_many_to_backup.return_value = {"id-1": OSError("403")}
+
+        extractor = MagicMock()
+        extractor.return_value.validation_errors = []
+        extractor.return_value.extract.return_value = []
+        target = "src.application.use_cases.consolidate_invoices.OfficialFormatExtractor"
+        with patch(target, extractor):
+            report = ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+        assert report.status == "PARTIAL"
+        assert report.files_with_errors == ["f1.xlsx"]
+        statuses = {c.args[0]: c.args[1] for c in mocks["tracker"].log_file_finish.call_args_list}
+        assert statuses == {1: "COMPLETED", 2: "ERROR"}
+
+    def test_failed_upload_returns_files_to_source(self, config, mocks):
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": f"id-{i}", "name": f"f{i}.xlsx", "modified_time": "2026-01-01"}
+            for i in range(2)
+        ]
+        mocks["tracker"].log_file_start.side_effect = [1, 2]
+        mocks["reader"].read.return_value = pd.DataFrame()
+        mocks["drive"].update_file.side_effect = OSError("upload")
+        mocks["lifecycle"].move_many_to_source.return_value = {}
+        records = {"id-0": [_record("F-1")], "id-1": [_record("F-2")]}
+        downloaded = {}
+        mocks["drive"].download_file.side_effect = lambda file_id, path: downloaded.update(
+            {path: file_id}
+        )
+
+        extractor = MagicMock()
+        extractor.return_value.validation_errors = []
+        extractor.return_value.extract.side_effect = lambda path: records[downloaded[path]]
+        target = "src.application.use_cases.consolidate_invoices.OfficialFormatExtractor"
+        with patch(target, extractor):
+            report = ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+        assert report.status == "ERROR"
+        assert report.files_with_errors == ["f0.xlsx", "f1.xlsx"]
+        assert (report.inserted_count, report.updated_count, report.unchanged_count) == (0, 0, 0)
+        assert report.source_total_amount == report.output_total_amount == 0
+        mocks["lifecycle"].move_many_to_backup.assert_not_called()
+        mocks["lifecycle"].move_many_to_source.assert_called_once_with(
+            ["id-0", "id-1"], "folder-id"
+        )
+        logged = mocks["tracker"].log_records_batch.call_args.args[0]
+        assert {row["action"] for row in logged} == {"WRITE_ERROR"}
+        statuses = {c.args[0]: c.args[1] for c in mocks["tracker"].log_file_finish.call_args_list}
+        assert statuses == {1: "ERROR", 2: "ERROR"}
+
+    def test_temp_downloads_are_unique_and_removed(self, config, mocks, tmp_path):
+        config = replace(config, downloads=DownloadsConfig(temp_path=str(tmp_path)))
+        mocks["path_resolver"].ensure_path.return_value = "folder-id"
+        mocks["drive"].find_file_in_folder.return_value = "consol-id"
+        mocks["drive"].list_source_files.return_value = [
+            {"file_id": f"id-{i}", "name": "same.xlsx", "modified_time": "2026-01-01"}
+            for i in range(2)
+        ]
+        mocks["tracker"].log_file_start.side_effect = [1, 2]
+        mocks["reader"].read.return_value = pd.DataFrame()
+        # Subcarpeta de otra ejecución simultánea y archivo ajeno: no deben tocarse
+        other_run = tmp_path / "run_other"
+        other_run.mkdir()
+        (other_run / "descarga.xlsx").write_bytes(b"x")
+        unrelated = tmp_path / "manual.xlsx"
+        unrelated.write_bytes(b"x")
+        # Subcarpeta abandonada por una ejecución interrumpida: se elimina
+        stale_run = tmp_path / "run_stale"
+        stale_run.mkdir()
+        (stale_run / "descarga.xlsx").write_bytes(b"x")
+        stale = time.time() - STALE_RUN_DIR_SECONDS - 60
+        os.utime(stale_run, (stale, stale))
+
+        extractor = MagicMock()
+        extractor.return_value.validation_errors = []
+        extractor.return_value.extract.return_value = []
+        target = "src.application.use_cases.consolidate_invoices.OfficialFormatExtractor"
+        with patch(target, extractor):
+            ConsolidateInvoicesUseCase(**mocks, config=config).execute()
+
+        paths = [c.args[1] for c in mocks["drive"].download_file.call_args_list]
+        assert len(set(paths)) == 3
+        assert {p.parent for p in paths} != {tmp_path}
+        assert sorted(tmp_path.iterdir()) == [unrelated, other_run]
+        assert (other_run / "descarga.xlsx").exists()